@@ -0,0 +1,116 @@
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+# Apps whose tables are read from a replica inside `read_from_replica` views.
+# Sessions, auth and allauth state always come from the primary, so a login
+# or logout is never hidden by replication lag.
+REPLICA_APPS = {"posts", "users"}
+
+STICKY_COOKIE = "db_primary_until"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_wrote = ContextVar("wrote", default=False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send the reads of opted-in views to a replica and everything else to the primary.
+
+    Writes always go to `default`. Reads go to one of `DATABASE_REPLICAS`
+    only inside a view decorated with `read_from_replica`, and only until the
+    request writes something, so a view never reads back stale copies of its
+    own changes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            _replica_reads.get()
+            and not _wrote.get()
+            and settings.DATABASE_REPLICAS
+            and model._meta.app_label in REPLICA_APPS
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold copies of the same rows.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+def pinned_to_primary(request: HttpRequest) -> bool:
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_from_replica(view: callable) -> callable:
+    """
+    Let a read-only GET view query the replicas.
+
+    The view falls back to the primary for other methods and while the
+    client's sticky window from `PrimaryStickinessMiddleware` is open, so a
+    user sees their own like, comment or post on the next page they load.
+
+    Args:
+        view (callable): The view function.
+
+    Returns:
+        callable: The wrapped view.
+    """
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if request.method not in ("GET", "HEAD") or pinned_to_primary(request):
+            return view(request, *args, **kwargs)
+        token = _replica_reads.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    return wrapper
+
+
+class PrimaryStickinessMiddleware:
+    """
+    Pin a client's reads to the primary for a while after its request wrote.
+
+    Any write routed during the request, e.g. a like toggle, a new comment or
+    post, opens a window of `REPLICA_STICKY_SECONDS` recorded in a cookie,
+    long enough for the replicas to catch up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            _wrote.reset(token)
+
+        if wrote and settings.DATABASE_REPLICAS:
+            window = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE,
+                f"{time.time() + window:.0f}",
+                max_age=window,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -56,10 +56,11 @@ MIDDLEWARE = [
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "users.middleware.ProfileAuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
+    "core.routers.PrimaryStickinessMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -96,9 +97,85 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # A file rather than the default shared in-memory database, so that tests
+        # running concurrent writers see SQLite's real locking.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
+# DB_PROFILE=production tunes SQLite for several gunicorn workers: WAL lets readers
+# run alongside the single writer, writers wait for the lock instead of failing,
+# transactions take the write lock up front so they cannot deadlock upgrading a
+# read lock, and connections are kept open between requests. Run
+# `manage.py db_maintenance` periodically (e.g. nightly) with this profile.
+# Sessions are kept in signed cookies there, so a request does not read the
+# session table; set SESSION_ENGINE to
+# "django.contrib.sessions.backends.cached_db" instead to keep server-side
+# sessions (e.g. to end them from the admin) behind a shared cache.
+DB_PROFILE = os.getenv("DB_PROFILE", "development")
+
+if DB_PROFILE == "production":
+    DATABASES["default"].update(
+        {
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 600)),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "transaction_mode": "IMMEDIATE",
+                "init_command": ";".join(
+                    [
+                        "PRAGMA journal_mode = WAL",
+                        "PRAGMA synchronous = NORMAL",
+                        "PRAGMA busy_timeout = 5000",  # milliseconds
+                        "PRAGMA mmap_size = 268435456",  # 256 MiB
+                        "PRAGMA cache_size = -65536",  # KiB, i.e. 64 MiB per connection
+                        "PRAGMA temp_store = MEMORY",
+                    ]
+                ),
+            },
+        }
+    )
+    SESSION_ENGINE = os.getenv(
+        "SESSION_ENGINE", "django.contrib.sessions.backends.signed_cookies"
+    )
+
+# Read replicas: DB_REPLICAS is a comma-separated list of database files kept in
+# sync with the primary (e.g. LiteFS read replicas). Views decorated with
+# `core.routers.read_from_replica` read from them; writes stay on the primary, and
+# a client that just wrote reads from the primary for REPLICA_STICKY_SECONDS.
+DATABASE_REPLICAS = []
+for i, path in enumerate(filter(None, os.getenv("DB_REPLICAS", "").split(","))):
+    alias = f"replica{i + 1}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "NAME": path.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["core.routers.PrimaryReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Rendered post and comment cards are cached here, keyed by their content
+# version. The local-memory default is per process; set CACHE_BACKEND and
+# CACHE_LOCATION to a shared backend (e.g. Redis) when running several workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "fragments"),
+        "TIMEOUT": 86400,
+    }
+}
+
+# Seconds a signed-in user's profile is cached for the header by
+# users.middleware.ProfileAuthenticationMiddleware.
+AUTH_PROFILE_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -156,4 +233,72 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 ACCOUNT_AUTHENTICATION_METHOD = "email"
 ACCOUNT_EMAIL_REQUIRED = True
 
-ACCOUNT_USERNAME_BLACKLIST = ["admin", "accounts", "profile", "category", "post"]
+ACCOUNT_USERNAME_BLACKLIST = [
+    "admin",
+    "accounts",
+    "profile",
+    "category",
+    "post",
+    "search",
+]
+
+# Number of posts returned per page of the home and category feeds
+FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", 3))
+
+# Number of comments per page of a post's comment thread, and of replies
+# loaded at a time under a comment
+COMMENTS_PAGE_SIZE = int(os.getenv("COMMENTS_PAGE_SIZE", 20))
+REPLIES_PAGE_SIZE = int(os.getenv("REPLIES_PAGE_SIZE", 10))
+
+# Number of posts per page of the latest and liked posts tabs of a profile
+PROFILE_PAGE_SIZE = int(os.getenv("PROFILE_PAGE_SIZE", 12))
+
+# Number of posts and comments kept on the top lists of a profile (UserStats)
+USER_STATS_TOP_SIZE = int(os.getenv("USER_STATS_TOP_SIZE", 12))
+
+# Number of posts and comments returned per page of search results
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", 10))
+
+# Seconds before every worker reloads its copy of the categories even if no
+# change was seen (the stamp may live in a per-process cache), and before the
+# category post counts shown in the sidebar are reread
+TAGS_VERSION_TTL = int(os.getenv("TAGS_VERSION_TTL", 60))
+TAG_COUNTS_TTL = int(os.getenv("TAG_COUNTS_TTL", 60))
+
+# Number of entries kept on the sidebar's top posts and top comments leaderboards
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", 10))
+
+# Background jobs (manage.py run_jobs)
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 30  # seconds before the first retry, doubled on each attempt
+JOB_LEASE_SECONDS = 300  # a running job is retried if its worker is silent this long
+
+# Buffered likes (manage.py flush_likes): like toggles are staged and applied in
+# batches instead of being written on each request
+LIKE_BUFFER = os.getenv("LIKE_BUFFER", "False") == "True"
+LIKE_FLUSH_BATCH = 500
+
+# Flickr fetch client: connect and read timeouts (seconds), connection pool size,
+# circuit breaker (consecutive failures before failing fast, seconds before retrying)
+# and metadata cache (entries, seconds)
+FLICKR_TIMEOUT = (3.05, 10)
+FLICKR_POOL_SIZE = 10
+FLICKR_FAILURE_THRESHOLD = 5
+FLICKR_RESET_TIMEOUT = 30
+FLICKR_CACHE_SIZE = 1024
+FLICKR_CACHE_TTL = 3600
+
+# Post image proxy: allowed widths of the generated variants (pixels), disk cache
+# location and size budget, largest accepted original and browser cache lifetime
+IMAGE_VARIANT_WIDTHS = [80, 160, 320, 640, 1024]
+IMAGE_CACHE_DIR = BASE_DIR / "cache" / "images"
+IMAGE_CACHE_MAX_BYTES = 500 * 1024 * 1024
+IMAGE_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Avatars: uploads are streamed to a temporary file instead of memory, capped in
+# size, and resized into square variants (pixels) by the background avatar job
+FILE_UPLOAD_HANDLERS = ["django.core.files.uploadhandler.TemporaryFileUploadHandler"]
+AVATAR_MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+AVATAR_MAX_SIZE = 1024
+AVATAR_SIZES = {"small": 64, "medium": 288}
@@ -29,21 +29,24 @@ urlpatterns = [
     path("", home_view, name="home"),
     path("category/<tag>/", home_view, name="category"),
     path("post/create/", post_create_view, name="post-create"),
-    path("post/delete/<pk>/", post_delete_view, name="post-delete"),
-    path("post/edit/<pk>/", post_edit_view, name="post-edit"),
-    path("post/<pk>/", post_page_view, name="post"),
-    path("post/like/<pk>/", like_post, name="like-post"),
-    path("comment/like/<pk>/", like_comment, name="like-comment"),
-    path("reply/like/<pk>/", like_reply, name="like-reply"),
+    path("post/delete/<uuid:pk>/", post_delete_view, name="post-delete"),
+    path("post/edit/<uuid:pk>/", post_edit_view, name="post-edit"),
+    path("post/<uuid:pk>/", post_page_view, name="post"),
+    path("image/<uuid:pk>/<int:width>/", post_image_view, name="post-image"),
+    path("post/like/<uuid:pk>/", like_post, name="like-post"),
+    path("comment/like/<uuid:pk>/", like_comment, name="like-comment"),
+    path("reply/like/<uuid:pk>/", like_reply, name="like-reply"),
+    path("search/", search_view, name="search"),
     path("profile/", profile_view, name="profile"),
     path("<username>/", profile_view, name="userprofile"),
     path("profile/edit/", profile_edit_view, name="profile-edit"),
     path("profile/delete/", profile_delete_view, name="profile-delete"),
     path("profile/onboarding/", profile_edit_view, name="profile-onboarding"),
-    path("commentsent/<pk>/", comment_sent, name="comment-sent"),
-    path("comment/delete/<pk>/", comment_delete_view, name="comment-delete"),
-    path("reply-sent/<pk>/", reply_sent, name="reply-sent"),
-    path("reply/delete/<pk>/", reply_delete_view, name="reply-delete"),
+    path("commentsent/<uuid:pk>/", comment_sent, name="comment-sent"),
+    path("comment/delete/<uuid:pk>/", comment_delete_view, name="comment-delete"),
+    path("comment/<uuid:pk>/replies/", comment_replies_view, name="comment-replies"),
+    path("reply-sent/<uuid:pk>/", reply_sent, name="reply-sent"),
+    path("reply/delete/<uuid:pk>/", reply_delete_view, name="reply-delete"),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
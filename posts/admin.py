@@ -9,3 +9,6 @@ admin.site.register(Reply)
 admin.site.register(LikedPost)
 admin.site.register(LikedComment)
 admin.site.register(LikedReply)
+admin.site.register(TopPost)
+admin.site.register(TopComment)
+admin.site.register(Job)
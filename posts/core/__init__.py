@@ -1 +1,10 @@
+from .feed import (
+    NEWEST_COMMENTS,
+    TOP_COMMENTS,
+    category_queryset,
+    comment_queryset,
+    feed_queryset,
+    liked_queryset,
+    paginate_feed,
+)
 from .post_form import CommentCreateForm, PostCreateForm, PostEditForm, ReplyCreateForm
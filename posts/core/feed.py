@@ -0,0 +1,192 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db.models import Field, Q, QuerySet
+
+from ..models import LikedPost, Post, PostTag
+from .tags import CachedTag
+
+
+def feed_queryset(posts: QuerySet = None) -> QuerySet:
+    """
+    Prepare posts for rendering as cards in a fixed number of queries.
+
+    Everything `posts/post.html` reads is loaded up front: the author and
+    their profile are joined, the tags are prefetched in one extra query,
+    and the like and comment counts come from the denormalized counter
+    columns. Whether the viewer liked a post is answered by the `liked_by`
+    template filter from their cached liked ids.
+
+    Args:
+        posts (QuerySet, optional): The posts to prepare. Defaults to all posts.
+
+    Returns:
+        QuerySet: The posts with their related data loaded.
+    """
+    if posts is None:
+        posts = Post.objects.all()
+    return posts.select_related("author__profile").prefetch_related("tags")
+
+
+def category_queryset(tag: CachedTag) -> QuerySet:
+    """
+    Prepare the posts of a category for rendering, as `PostTag` rows.
+
+    The rows are read in `(created, post)` order from the category's slice of
+    the `posttag_tag_created_idx` index, so a page only touches the posts on
+    it. Each row's `post` is loaded like in `feed_queryset`.
+
+    Args:
+        tag (CachedTag): The category.
+
+    Returns:
+        QuerySet: The category's `PostTag` rows with their posts loaded.
+    """
+    return (
+        PostTag.objects.filter(tag_id=tag.id)
+        .select_related("post__author__profile")
+        .prefetch_related("post__tags")
+    )
+
+
+def liked_queryset(user: User) -> QuerySet:
+    """
+    Prepare the posts a user liked for rendering, as `LikedPost` rows.
+
+    The rows are read in `(created, post)` order from the user's slice of the
+    `likedpost_user_created_idx` index. Each row's `post` is loaded like in
+    `feed_queryset`.
+
+    Args:
+        user (User): The user whose likes are listed.
+
+    Returns:
+        QuerySet: The user's `LikedPost` rows with their posts loaded.
+    """
+    return (
+        LikedPost.objects.filter(user=user)
+        .select_related("post__author__profile")
+        .prefetch_related("post__tags")
+    )
+
+
+# Keyset sort keys of a post's comments, newest first and most liked first.
+NEWEST_COMMENTS = ("created", "id")
+TOP_COMMENTS = ("likes_count", "created", "id")
+
+
+def comment_queryset(comments: QuerySet) -> QuerySet:
+    """
+    Prepare comments or replies for rendering as cards in a fixed number of queries.
+
+    The author and their profile are joined; reply counts come from the
+    denormalized `replies_count` column and the replies themselves are loaded
+    on demand by `comment_replies_view`.
+
+    Args:
+        comments (QuerySet): The comments or replies to prepare.
+
+    Returns:
+        QuerySet: The rows with their authors loaded.
+    """
+    return comments.select_related("author__profile")
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encode the keyset position of a row as an opaque, URL-safe cursor.
+
+    Args:
+        *values: The sort key values of the last row of the page, e.g. its
+            `created` timestamp and `id`.
+
+    Returns:
+        str: A cursor pointing just after the row in descending key order.
+    """
+    parts = [v.isoformat() if isinstance(v, datetime) else str(v) for v in values]
+    raw = "|".join(parts).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, fields: list[Field]) -> list:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor taken from the request.
+        fields (list[Field]): The model fields of the sort key, which convert
+            the encoded values back to Python.
+
+    Returns:
+        list: The sort key values of the last seen row.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        parts = raw.split("|", len(fields) - 1)
+        if len(parts) != len(fields):
+            raise ValueError
+        return [field.to_python(part) for field, part in zip(fields, parts)]
+    except (binascii.Error, UnicodeDecodeError, ValueError, ValidationError):
+        raise ValueError(f"Invalid feed cursor: {cursor!r}")
+
+
+def paginate_feed(
+    posts: QuerySet,
+    cursor: str = None,
+    page_size: int = None,
+    key: tuple[str, ...] = ("created", "id"),
+) -> tuple[list, str]:
+    """
+    Return one page of a feed using keyset pagination on a descending key.
+
+    Unlike OFFSET pagination, the cost of a page does not grow with its depth
+    and no `COUNT(*)` is issued: one extra row is fetched to know whether
+    another page follows. The key must end with a unique field, and an index
+    on the filtered columns followed by the key lets every page be read in
+    index order.
+
+    Args:
+        posts (QuerySet): The rows to paginate, e.g. all posts, a category or
+            the comments of a post.
+        cursor (str, optional): The cursor returned with the previous page.
+            Defaults to None, which returns the first page.
+        page_size (int, optional): The number of rows per page. Defaults to
+            the `FEED_PAGE_SIZE` setting.
+        key (tuple[str, ...], optional): The fields the rows are sorted on,
+            e.g. `("created", "post_id")` for the `PostTag` rows of
+            `category_queryset` or `("likes_count", "created", "id")` for top
+            comments. Defaults to the post's creation time and id.
+
+    Returns:
+        tuple[list, str]: The rows of the page and the cursor of the next page,
+        or None when the end of the feed has been reached.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    page_size = page_size or settings.FEED_PAGE_SIZE
+    posts = posts.order_by(*(f"-{name}" for name in key))
+
+    if cursor:
+        fields = [posts.model._meta.get_field(name) for name in key]
+        values = decode_cursor(cursor, fields)
+        after = Q()
+        for i, name in enumerate(key):
+            equal = {key[j]: values[j] for j in range(i)}
+            after |= Q(**equal, **{f"{name}__lt": values[i]})
+        # The redundant bound on the leading field lets the database seek
+        # into the index instead of filtering it from the start.
+        posts = posts.filter(after, **{f"{key[0]}__lte": values[0]})
+
+    page = list(posts[: page_size + 1])
+    if len(page) > page_size:
+        page = page[:page_size]
+        return page, encode_cursor(*(getattr(page[-1], name) for name in key))
+    return page, None
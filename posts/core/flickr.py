@@ -0,0 +1,420 @@
+import codecs
+import threading
+import time
+from collections import OrderedDict
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from bs4 import BeautifulSoup
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from ..models import Post
+
+IMAGE_PREFIX = "https://live.staticflickr.com/"
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without contacting Flickr while the circuit breaker is open."""
+
+
+class FlickrMetadataParser(HTMLParser):
+    """
+    An incremental HTML tokenizer that picks the photo metadata out of a Flickr page.
+
+    It looks for the same elements as the selectors
+    `meta[content^="https://live.staticflickr.com/"]`, `h1.photo-title` and
+    `a.owner-name`, keeping the first match of each, without building a tree.
+    Feed it chunks of the page and stop as soon as `complete` is true.
+
+    Attributes:
+        image (str): The url of the photo, once found.
+        title (str): The text of the photo title, once found.
+        artist (str): The text of the owner name, once found.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.image = None
+        self.title = None
+        self.artist = None
+        self._field = None
+        self._tag = None
+        self._depth = 0
+        self._text = []
+
+    @property
+    def complete(self) -> bool:
+        """
+        Whether all three fields have been found.
+
+        Returns:
+            bool: True once `image`, `title` and `artist` are set.
+        """
+        return None not in (self.image, self.title, self.artist)
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if self._field:
+            if tag == self._tag:
+                self._depth += 1
+            return
+
+        if tag == "meta" and self.image is None:
+            content = dict(attrs).get("content") or ""
+            if content.startswith(IMAGE_PREFIX):
+                self.image = content
+        elif tag in ("h1", "a"):
+            field, name = (
+                ("title", "photo-title") if tag == "h1" else ("artist", "owner-name")
+            )
+            classes = (dict(attrs).get("class") or "").split()
+            if getattr(self, field) is None and name in classes:
+                self._field, self._tag, self._depth, self._text = field, tag, 1, []
+
+    def handle_data(self, data: str) -> None:
+        if self._field:
+            self._text.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._field and tag == self._tag:
+            self._depth -= 1
+            if self._depth == 0:
+                setattr(self, self._field, "".join(self._text).strip())
+                self._field = None
+
+
+def extract_flickr_metadata(chunks, url: str) -> dict:
+    """
+    Extract the metadata of a photo from a stream of its Flickr page.
+
+    Chunks are consumed only until the image, title and artist have all been
+    found, so the rest of the page is never downloaded nor parsed.
+
+    Args:
+        chunks (Iterable[str]): The HTML of the photo page, in order.
+        url (str): The url of the page, used in error messages.
+
+    Returns:
+        dict: The `image` url, `title` and `artist` of the photo.
+
+    Raises:
+        ValueError: If the page does not contain the expected metadata.
+    """
+    parser = FlickrMetadataParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.complete:
+            break
+    else:
+        parser.close()
+
+    if not parser.complete:
+        raise ValueError(f"No Flickr photo metadata found at {url}")
+    return {"image": parser.image, "title": parser.title, "artist": parser.artist}
+
+
+def iter_text(response: requests.Response, chunk_size: int = 16384):
+    """
+    Decode a streamed response incrementally.
+
+    Args:
+        response (requests.Response): A response fetched with `stream=True`.
+        chunk_size (int, optional): The number of bytes read at a time.
+
+    Yields:
+        str: The decoded text of each chunk.
+    """
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")("replace")
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def normalize_photo_url(url: str) -> str:
+    """
+    Normalize the url of a Flickr photo page so that equivalent urls compare equal.
+
+    The scheme and host are lowercased, the query string and fragment are
+    dropped, and photo urls are cut down to `/photos/<owner>/<photo id>/`,
+    removing suffixes such as `/in/explore-2025-01-01/`.
+
+    Args:
+        url (str): The url as entered by the user.
+
+    Returns:
+        str: The normalized url.
+    """
+    parts = urlsplit(url.strip())
+    segments = [segment for segment in parts.path.split("/") if segment]
+    if len(segments) >= 3 and segments[0] == "photos":
+        segments = segments[:3]
+    path = "/" + "/".join(segments) + "/" if segments else "/"
+    return urlunsplit(
+        (parts.scheme.lower() or "https", parts.netloc.lower(), path, "", "")
+    )
+
+
+def parse_flickr_metadata(html: str, url: str) -> dict:
+    """
+    Extract the metadata of a photo from the HTML of its Flickr page with BeautifulSoup.
+
+    This builds a tree of the whole page; `extract_flickr_metadata` is used to
+    resolve posts and this version is kept as the baseline of the
+    `bench_flickr_parser` command.
+
+    Args:
+        html (str): The HTML of the photo page.
+        url (str): The url of the page, used in error messages.
+
+    Returns:
+        dict: The `image` url, `title` and `artist` of the photo.
+
+    Raises:
+        ValueError: If the page does not contain the expected metadata.
+    """
+    sourcecode = BeautifulSoup(html, "html.parser")
+
+    find_image = sourcecode.select('meta[content^="https://live.staticflickr.com/"]')
+    find_title = sourcecode.select("h1.photo-title")
+    find_artist = sourcecode.select("a.owner-name")
+    if not (find_image and find_title and find_artist):
+        raise ValueError(f"No Flickr photo metadata found at {url}")
+
+    return {
+        "image": find_image[0]["content"],
+        "title": find_title[0].text.strip(),
+        "artist": find_artist[0].text.strip(),
+    }
+
+
+def known_metadata(url: str) -> dict | None:
+    """
+    Look up the metadata of a photo that has already been posted.
+
+    Args:
+        url (str): The normalized url of the photo page.
+
+    Returns:
+        dict | None: The `image`, `title` and `artist` stored on an existing
+        post with the same url, or None if the photo has not been posted yet.
+    """
+    return (
+        Post.objects.filter(url=url, status=Post.READY)
+        .values("image", "title", "artist")
+        .first()
+    )
+
+
+class FlickrClient:
+    """
+    A thread-safe client for fetching Flickr photo pages.
+
+    Connections are pooled and reused through a single `requests.Session`,
+    every request is bounded by connect and read timeouts, and a circuit
+    breaker fails fast with `CircuitOpenError` after `failure_threshold`
+    consecutive failures (connection errors, timeouts and 5xx responses)
+    until `reset_timeout` seconds have passed. Resolved
+    metadata is kept in an LRU cache whose entries expire after `cache_ttl`
+    seconds, keyed by the normalized photo url.
+
+    Attributes:
+        session (requests.Session): The pooled HTTP session.
+        timeout (tuple): The connect and read timeouts in seconds.
+    """
+
+    def __init__(
+        self,
+        timeout: tuple = (3.05, 10),
+        pool_size: int = 10,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        cache_size: int = 1024,
+        cache_ttl: float = 3600,
+    ):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._cache = OrderedDict()
+
+    def get(self, url: str) -> requests.Response:
+        """
+        Fetch a page through the circuit breaker.
+
+        The body is streamed: the caller reads it with `iter_text` and must
+        close the response when done.
+
+        Args:
+            url (str): The url to fetch.
+
+        Returns:
+            requests.Response: The successful, unread response.
+
+        Raises:
+            CircuitOpenError: If Flickr is considered degraded.
+            requests.RequestException: If the request fails or times out.
+        """
+        with self._lock:
+            if self._opened_at is not None:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"Circuit open, not fetching {url}")
+                # Half-open: let this request probe whether Flickr recovered.
+                self._opened_at = time.monotonic()
+
+        try:
+            response = self.session.get(url, timeout=self.timeout, stream=True)
+            if not response.ok:
+                response.close()
+            response.raise_for_status()
+        except requests.RequestException as error:
+            response = getattr(error, "response", None)
+            if response is not None and response.status_code < 500:
+                # A missing or private photo says nothing about Flickr's health.
+                raise
+            with self._lock:
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._opened_at = time.monotonic()
+            raise
+
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+        return response
+
+    def cached_metadata(self, url: str) -> dict | None:
+        """
+        Return the cached metadata of a photo, if present and not expired.
+
+        Args:
+            url (str): The normalized url of the photo page.
+
+        Returns:
+            dict | None: The cached metadata, or None on a cache miss.
+        """
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is None:
+                return None
+            metadata, expires = entry
+            if expires < time.monotonic():
+                del self._cache[url]
+                return None
+            self._cache.move_to_end(url)
+            return metadata
+
+    def remember(self, url: str, metadata: dict) -> None:
+        """
+        Store the metadata of a photo in the cache, evicting the least recently used entry.
+
+        Args:
+            url (str): The normalized url of the photo page.
+            metadata (dict): The metadata to cache.
+        """
+        with self._lock:
+            self._cache[url] = (metadata, time.monotonic() + self.cache_ttl)
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def fetch_metadata(self, url: str) -> dict:
+        """
+        Resolve the metadata of a photo, from the cache if possible.
+
+        Args:
+            url (str): The url of the photo page on Flickr.
+
+        Returns:
+            dict: The `image` url, `title` and `artist` of the photo.
+
+        Raises:
+            requests.RequestException: If the page cannot be fetched.
+            ValueError: If the page does not contain the expected metadata.
+        """
+        url = normalize_photo_url(url)
+        metadata = self.cached_metadata(url)
+        if metadata is None:
+            with self.get(url) as response:
+                metadata = extract_flickr_metadata(iter_text(response), url)
+            self.remember(url, metadata)
+        return metadata
+
+
+flickr_client = None
+
+
+def get_flickr_client() -> FlickrClient:
+    """
+    Return the process-wide Flickr client, creating it from the settings on first use.
+
+    Returns:
+        FlickrClient: The shared client.
+    """
+    global flickr_client
+    if flickr_client is None:
+        flickr_client = FlickrClient(
+            timeout=settings.FLICKR_TIMEOUT,
+            pool_size=settings.FLICKR_POOL_SIZE,
+            failure_threshold=settings.FLICKR_FAILURE_THRESHOLD,
+            reset_timeout=settings.FLICKR_RESET_TIMEOUT,
+            cache_size=settings.FLICKR_CACHE_SIZE,
+            cache_ttl=settings.FLICKR_CACHE_TTL,
+        )
+    return flickr_client
+
+
+image_client = None
+
+
+def get_image_client() -> FlickrClient:
+    """
+    Return the process-wide client of the post image proxy.
+
+    Images are downloaded through a client of their own, so that slow or
+    failing image fetches open their own circuit breaker and leave the
+    resolution of post metadata alone.
+
+    Returns:
+        FlickrClient: The image client.
+    """
+    global image_client
+    if image_client is None:
+        image_client = FlickrClient(
+            timeout=settings.FLICKR_TIMEOUT,
+            pool_size=settings.FLICKR_POOL_SIZE,
+            failure_threshold=settings.FLICKR_FAILURE_THRESHOLD,
+            reset_timeout=settings.FLICKR_RESET_TIMEOUT,
+        )
+    return image_client
+
+
+def fetch_flickr_metadata(url: str) -> dict:
+    """
+    Resolve the metadata of a Flickr photo.
+
+    Metadata already stored on a post with the same url is reused; otherwise
+    the page is fetched through the shared `FlickrClient`.
+
+    Args:
+        url (str): The url of the photo page on Flickr.
+
+    Returns:
+        dict: The `image` url, `title` and `artist` of the photo.
+
+    Raises:
+        requests.RequestException: If the page cannot be fetched.
+        ValueError: If the page does not contain the expected metadata.
+    """
+    return known_metadata(
+        normalize_photo_url(url)
+    ) or get_flickr_client().fetch_metadata(url)
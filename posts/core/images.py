@@ -0,0 +1,188 @@
+import hashlib
+import os
+import tempfile
+import threading
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from .flickr import get_image_client
+from .jobs import enqueue
+
+# A sweep of the cache is queued each time a worker has written this share of
+# the cache budget since its last one.
+SWEEP_FRACTION = 0.1
+
+_written_lock = threading.Lock()
+_written = 0
+
+
+def cache_path(image_url: str, name: str) -> Path:
+    """
+    Return where a file derived from an image is stored in the disk cache.
+
+    Args:
+        image_url (str): The url of the original image.
+        name (str): The name of the derived file, e.g. `640.jpg`.
+
+    Returns:
+        Path: The path of the file, sharded by the hash of the url.
+    """
+    key = hashlib.sha1(image_url.encode()).hexdigest()
+    return Path(settings.IMAGE_CACHE_DIR) / key[:2] / f"{key}-{name}"
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """
+    Write a file so that concurrent readers never see it half written.
+
+    Args:
+        path (Path): The destination.
+        data (bytes): The content of the file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as file:
+        file.write(data)
+    os.replace(tmp, path)
+
+
+def record_write(size: int) -> None:
+    """
+    Count the bytes a worker added to the cache, queueing a sweep when due.
+
+    Scanning the cache costs a `stat()` per file, so it is not done on every
+    miss: each worker only counts what it writes, and once that reaches
+    `SWEEP_FRACTION` of `IMAGE_CACHE_MAX_BYTES` an `image-cache` job runs
+    `evict` in the background worker. The cache can thus exceed its budget by
+    about that share per web worker between sweeps.
+
+    Args:
+        size (int): The size of the file written, in bytes.
+    """
+    global _written
+    with _written_lock:
+        _written += size
+        due = _written >= settings.IMAGE_CACHE_MAX_BYTES * SWEEP_FRACTION
+        if due:
+            _written = 0
+    if due:
+        enqueue("image-cache", "evict")
+
+
+def fetch_original(image_url: str) -> bytes:
+    """
+    Return the original image, downloading it only if it is not cached yet.
+
+    Args:
+        image_url (str): The url of the image on Flickr.
+
+    Returns:
+        bytes: The image file.
+
+    Raises:
+        requests.RequestException: If the image cannot be downloaded.
+        ValueError: If the image is larger than `IMAGE_MAX_BYTES`.
+    """
+    path = cache_path(image_url, "original")
+    if path.exists():
+        path.touch()
+        return path.read_bytes()
+
+    data = bytearray()
+    with get_image_client().get(image_url) as response:
+        for chunk in response.iter_content(chunk_size=65536):
+            data += chunk
+            if len(data) > settings.IMAGE_MAX_BYTES:
+                raise ValueError(f"{image_url} is larger than IMAGE_MAX_BYTES")
+    write_atomic(path, bytes(data))
+    record_write(len(data))
+    return bytes(data)
+
+
+def resize(data: bytes, width: int) -> bytes:
+    """
+    Scale an image down to a width and encode it as a progressive JPEG.
+
+    Images narrower than `width` keep their size; metadata is not copied.
+
+    Args:
+        data (bytes): The original image file.
+        width (int): The maximal width of the variant in pixels.
+
+    Returns:
+        bytes: The JPEG file of the variant.
+    """
+    with Image.open(BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        if image.width > width:
+            image = image.resize(
+                (width, round(image.height * width / image.width)),
+                Image.Resampling.LANCZOS,
+            )
+        output = BytesIO()
+        image.save(output, "JPEG", quality=82, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def evict(max_bytes: int) -> None:
+    """
+    Remove the least recently used files until the cache fits in `max_bytes`.
+
+    Cache hits refresh a file's modification time, so the oldest files are
+    the least recently used ones. The cache is trimmed to 90% of its budget
+    so that the next sweep has room to spare. A file removed while it is
+    being served stays readable through the open handle.
+
+    Args:
+        max_bytes (int): The size budget of the cache.
+    """
+    files = []
+    total = 0
+    for path in Path(settings.IMAGE_CACHE_DIR).glob("*/*"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    if total <= max_bytes:
+        return
+
+    for _, size, path in sorted(files):
+        path.unlink(missing_ok=True)
+        total -= size
+        if total <= max_bytes * 0.9:
+            break
+
+
+def get_variant(image_url: str, width: int) -> Path:
+    """
+    Return the path of an image scaled to `width`, generating it on a cache miss.
+
+    Args:
+        image_url (str): The url of the original image.
+        width (int): One of the `IMAGE_VARIANT_WIDTHS`.
+
+    Returns:
+        Path: The cached JPEG variant.
+
+    Raises:
+        requests.RequestException: If the original cannot be downloaded.
+        ValueError: If the original is too large or not an image.
+    """
+    path = cache_path(image_url, f"{width}.jpg")
+    if path.exists():
+        path.touch()
+        return path
+
+    original = fetch_original(image_url)
+    try:
+        variant = resize(original, width)
+    except OSError as error:
+        raise ValueError(f"Cannot read {image_url}: {error}")
+    write_atomic(path, variant)
+    record_write(len(variant))
+    return path
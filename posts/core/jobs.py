@@ -0,0 +1,122 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+class PermanentJobError(Exception):
+    """Raised by a job handler for a failure that retrying cannot fix."""
+
+
+def job_handler(kind: str, on_failure: callable = None) -> callable:
+    """
+    A decorator that registers a function as the handler of a kind of job.
+
+    Args:
+        kind (str): The job kind the handler processes.
+        on_failure (callable, optional): Called with the job's `object_id` once
+            the job has exhausted its attempts. Defaults to None.
+
+    Returns:
+        callable: A decorator returning the handler unchanged.
+    """
+
+    def inner_func(func: callable) -> callable:
+        HANDLERS[kind] = (func, on_failure)
+        return func
+
+    return inner_func
+
+
+def enqueue(kind: str, object_id: str) -> Job:
+    """
+    Add a job to the queue.
+
+    Args:
+        kind (str): The kind of the job; a handler must be registered for it.
+        object_id (str): The primary key of the object the job works on.
+
+    Returns:
+        Job: The enqueued job.
+    """
+    return Job.objects.create(kind=kind, object_id=str(object_id))
+
+
+def claim_job() -> Job | None:
+    """
+    Take the next due job and lease it to the calling worker.
+
+    A job is due when it is pending and its `run_after` has passed, or when it
+    is running but its lease expired because its worker died. The claim is a
+    conditional UPDATE, so two workers can never claim the same job.
+
+    Returns:
+        Job | None: The claimed job, or None if no job is due.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    due = Job.objects.filter(
+        status__in=[Job.PENDING, Job.RUNNING], run_after__lte=now
+    ).order_by("run_after")
+
+    for job in due[:10]:
+        claimed = Job.objects.filter(
+            id=job.id, status=job.status, run_after=job.run_after
+        ).update(status=Job.RUNNING, run_after=lease, attempts=job.attempts + 1)
+        if claimed:
+            job.status, job.run_after, job.attempts = (
+                Job.RUNNING,
+                lease,
+                job.attempts + 1,
+            )
+            return job
+    return None
+
+
+def run_job(job: Job) -> None:
+    """
+    Run a claimed job and record its outcome.
+
+    A job that raises is retried with an exponential backoff until it has been
+    tried `JOB_MAX_ATTEMPTS` times, or right away if it raised
+    `PermanentJobError`, after which it is marked as failed and the handler's
+    `on_failure` callback is invoked.
+
+    The outcome is only written while the worker still holds the job's lease:
+    if the lease expired and another worker claimed the job again, the row
+    belongs to that worker and the stale outcome is dropped.
+
+    Args:
+        job (Job): A job returned by `claim_job`.
+    """
+    func, on_failure = HANDLERS[job.kind]
+    lease, failed = job.run_after, False
+    try:
+        func(job.object_id)
+    except Exception as error:
+        logger.warning("Job %s failed on attempt %s: %s", job, job.attempts, error)
+        job.last_error = f"{type(error).__name__}: {error}"
+        permanent = isinstance(error, PermanentJobError)
+        if permanent or job.attempts >= settings.JOB_MAX_ATTEMPTS:
+            job.status, failed = Job.FAILED, True
+        else:
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+    else:
+        job.status = Job.DONE
+
+    held = Job.objects.filter(
+        id=job.id, status=Job.RUNNING, run_after=lease, attempts=job.attempts
+    ).update(status=job.status, run_after=job.run_after, last_error=job.last_error)
+    if not held:
+        logger.warning("Job %s lost its lease, its outcome is dropped", job)
+    elif failed and on_failure:
+        on_failure(job.object_id)
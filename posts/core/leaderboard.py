@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.db import models, transaction
+
+from ..models import Comment, Post, TopComment, TopPost
+
+BOARDS = {
+    Post: (TopPost, "post"),
+    Comment: (TopComment, "comment"),
+}
+
+
+def rebuild_leaderboard(model: type) -> int:
+    """
+    Recompute the leaderboard of `model` from its `likes_count` column.
+
+    Args:
+        model (type): `Post` or `Comment`.
+
+    Returns:
+        int: The number of entries on the rebuilt leaderboard.
+    """
+    board, field = BOARDS[model]
+    top = model.objects.filter(likes_count__gt=0).order_by("-likes_count", "-created")
+    entries = [
+        board(**{field: obj}, score=obj.likes_count, created=obj.created)
+        for obj in top.only("id", "likes_count", "created")[: settings.LEADERBOARD_SIZE]
+    ]
+    with transaction.atomic():
+        board.objects.all().delete()
+        board.objects.bulk_create(entries)
+    return len(entries)
+
+
+def fill_leaderboard(model: type) -> None:
+    """
+    Let the best objects outside the leaderboard of `model` take up free or lost places.
+
+    Each round compares the lowest entry with the best object off the board,
+    found with one indexed query, and stops as soon as that object would not
+    make it. After a decrease or a deletion this costs a single extra query, as
+    only the place that was lost or freed can change hands.
+
+    Args:
+        model (type): `Post` or `Comment`.
+    """
+    board, field = BOARDS[model]
+    size = settings.LEADERBOARD_SIZE
+    with transaction.atomic():
+        while True:
+            outsider = (
+                model.objects.filter(likes_count__gt=0)
+                .exclude(id__in=board.objects.values(field))
+                .order_by("-likes_count", "-created")
+                .only("id", "likes_count", "created")
+                .first()
+            )
+            if outsider is None:
+                return
+            last = board.objects.all()[size - 1 : size].first()
+            if last and (outsider.likes_count, outsider.created) <= (
+                last.score,
+                last.created,
+            ):
+                return
+            board.objects.create(
+                **{field: outsider},
+                score=outsider.likes_count,
+                created=outsider.created
+            )
+            board.objects.exclude(pk__in=board.objects.values("pk")[:size]).delete()
+
+
+def update_leaderboard(obj: models.Model) -> None:
+    """
+    Apply the current `likes_count` of a liked or unliked object to its leaderboard.
+
+    The leaderboard holds the top `LEADERBOARD_SIZE` objects by likes, newest
+    first among equal scores, so an increase only ever needs to compare against
+    the lowest entry. A decrease lowers the entry's score, and the best object
+    outside the board then takes its place if it now ranks higher (see
+    `fill_leaderboard`). A new entry is inserted, then everything past the last place is
+    removed with a single ordered DELETE, so concurrent likes cannot leave the
+    board longer than `LEADERBOARD_SIZE`.
+
+    Args:
+        obj (models.Model): A `Post` or `Comment` with an up to date `likes_count`.
+            Other objects (e.g. replies) are ignored.
+    """
+    if type(obj) not in BOARDS:
+        return
+    board, field = BOARDS[type(obj)]
+
+    with transaction.atomic():
+        entry = board.objects.filter(**{field: obj}).first()
+        if entry:
+            decreased = obj.likes_count < entry.score
+            if obj.likes_count == 0:
+                entry.delete()
+            else:
+                entry.score = obj.likes_count
+                entry.save(update_fields=["score"])
+            if decreased:
+                fill_leaderboard(type(obj))
+            return
+
+        if obj.likes_count == 0:
+            return
+        size = settings.LEADERBOARD_SIZE
+        last = board.objects.all()[size - 1 : size].first()
+        if last and (obj.likes_count, obj.created) <= (last.score, last.created):
+            return
+        board.objects.create(**{field: obj}, score=obj.likes_count, created=obj.created)
+        board.objects.exclude(pk__in=board.objects.values("pk")[:size]).delete()
@@ -0,0 +1,251 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from uuid import UUID
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import IntegrityError, transaction
+from django.db.models import F, Model
+
+from ..models import Comment, PendingLike, Post, Reply
+from .leaderboard import update_leaderboard
+from .stats import record_likes
+
+LIKEABLE = {model._meta.model_name: model for model in (Post, Comment, Reply)}
+
+
+class LikedIds:
+    """
+    The sorted ids of the objects of one model a user has liked.
+
+    Only the ids are kept, so the set stays small and membership is a binary
+    search over in-memory data. `pending` holds the
+    ids whose like state was flipped by a buffered toggle that has not been
+    flushed yet, and is already reflected in `ids`.
+
+    Args:
+        ids (iterable): The ids of the liked objects, in any order.
+        pending (iterable, optional): The ids with an unflushed toggle.
+    """
+
+    def __init__(self, ids=(), pending=()):
+        self.ids = sorted(ids)
+        self.pending = sorted(pending)
+
+    @staticmethod
+    def _find(ids: list, pk) -> bool:
+        i = bisect_left(ids, pk)
+        return i < len(ids) and ids[i] == pk
+
+    def __contains__(self, pk) -> bool:
+        return self._find(self.ids, pk)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def delta(self, pk) -> int:
+        """
+        Return the change the user's unflushed toggle makes to the object's likes.
+
+        Args:
+            pk: The id of the object.
+
+        Returns:
+            int: 1 for a pending like, -1 for a pending unlike, otherwise 0.
+        """
+        if not self._find(self.pending, pk):
+            return 0
+        return 1 if pk in self else -1
+
+
+def pending_toggles(user: User, model: type[Model]) -> set:
+    """
+    Return the ids of the `model` objects whose like `user` has flipped in the buffer.
+
+    Args:
+        user (User): The user who toggled the likes.
+        model (type[Model]): Post, Comment or Reply.
+
+    Returns:
+        set: The ids with an odd number of pending toggles.
+    """
+    toggles = Counter(
+        PendingLike.objects.filter(user=user, kind=model._meta.model_name).values_list(
+            "object_id", flat=True
+        )
+    )
+    to_python = model._meta.pk.to_python
+    return {to_python(pk) for pk, count in toggles.items() if count % 2}
+
+
+def liked_ids(user: User | AnonymousUser, model: type[Model]) -> LikedIds:
+    """
+    Return the ids of the `model` objects `user` has liked.
+
+    The set is built with a single query at most once per user object, i.e.
+    once per request for `request.user`, and kept on that object only: a
+    shared copy would outlive toggles and flushes made by other processes.
+    `toggle_like` drops it through `forget_liked_ids`. With `LIKE_BUFFER`
+    enabled the user's unflushed toggles are read as well and merged in, so
+    their own likes show up before the flusher has run.
+
+    Args:
+        user (User | AnonymousUser): The viewing user, or None.
+        model (type[Model]): Post, Comment or Reply.
+
+    Returns:
+        LikedIds: The liked ids, empty for anonymous users.
+    """
+    if user is None or not user.is_authenticated:
+        return LikedIds()
+
+    loaded = getattr(user, "_liked_ids", None)
+    if loaded is None:
+        loaded = user._liked_ids = {}
+    if model not in loaded:
+        field = f"{model._meta.model_name}_id"
+        liked = set(
+            model.likes.through.objects.filter(user=user).values_list(field, flat=True)
+        )
+        toggled = pending_toggles(user, model) if settings.LIKE_BUFFER else set()
+        loaded[model] = LikedIds(liked ^ toggled, toggled)
+    return loaded[model]
+
+
+def forget_liked_ids(user: User, model: type[Model]) -> None:
+    """
+    Drop the liked ids of `user` for `model` loaded earlier in the request.
+
+    Args:
+        user (User): The user whose likes changed.
+        model (type[Model]): Post, Comment or Reply.
+    """
+    getattr(user, "_liked_ids", {}).pop(model, None)
+
+
+def flip_like(model: type[Model], user_id: int, object_id: UUID) -> int:
+    """
+    Remove a user's like row for an object, or insert it if there was none.
+
+    The delete and the insert are single statements, and the unique
+    `(user, object)` constraint makes the insert fail instead of duplicating
+    the row when a concurrent toggle got there first. That toggle's like is
+    kept, so racing toggles never leave the row and the counter apart.
+
+    Args:
+        model (type[Model]): Post, Comment or Reply.
+        user_id (int): The id of the user toggling the like.
+        object_id (UUID): The id of the liked object.
+
+    Returns:
+        int: The change to the object's likes: 1, -1, or 0 when a concurrent
+        toggle had already inserted the row.
+    """
+    through = model.likes.through
+    field = f"{model._meta.model_name}_id"
+    deleted, _ = through.objects.filter(user_id=user_id, **{field: object_id}).delete()
+    if deleted:
+        return -1
+    try:
+        with transaction.atomic():
+            through.objects.create(user_id=user_id, **{field: object_id})
+    except IntegrityError:
+        return 0
+    return 1
+
+
+def toggle_like(user: User, obj: Model) -> tuple[bool, int]:
+    """
+    Like or unlike `obj` for `user` in one transaction.
+
+    Args:
+        user (User): The user toggling the like.
+        obj (Model): The Post, Comment or Reply. Its `likes_count` is updated
+            in place.
+
+    Returns:
+        tuple[bool, int]: Whether `user` now likes `obj`, and its like count.
+    """
+    model = type(obj)
+    with transaction.atomic():
+        delta = flip_like(model, user.id, obj.id)
+        if delta:
+            model.objects.filter(id=obj.id).update(likes_count=F("likes_count") + delta)
+        obj.likes_count = model.objects.values_list("likes_count", flat=True).get(
+            id=obj.id
+        )
+        record_likes(obj, delta)
+    forget_liked_ids(user, model)
+    return delta >= 0, obj.likes_count
+
+
+def buffer_like(user: User, obj: Model) -> None:
+    """
+    Stage a like toggle of `user` on `obj` for `flush_likes`.
+
+    This is a single-row insert, so it holds the database write lock far
+    shorter than applying the like and updating the counters.
+
+    Args:
+        user (User): The user toggling the like.
+        obj (Model): The liked Post, Comment or Reply.
+    """
+    PendingLike.objects.create(kind=obj._meta.model_name, object_id=obj.id, user=user)
+    forget_liked_ids(user, type(obj))
+
+
+def flush_pending_likes(batch_size: int = None) -> int:
+    """
+    Apply the oldest buffered like toggles in one transaction.
+
+    Toggles of the same user on the same object cancel out in pairs, each
+    remaining one adds or removes the like row, and every touched object's
+    `likes_count` is updated once with the net change. Toggles on objects that
+    were deleted in the meantime are dropped.
+
+    Args:
+        batch_size (int, optional): The maximum number of toggles to apply.
+            Defaults to the `LIKE_FLUSH_BATCH` setting.
+
+    Returns:
+        int: The number of toggles consumed, 0 when the buffer is empty.
+    """
+    batch_size = batch_size or settings.LIKE_FLUSH_BATCH
+
+    with transaction.atomic():
+        batch = list(PendingLike.objects.order_by("id")[:batch_size])
+        if not batch:
+            return 0
+
+        toggles = Counter((p.kind, p.object_id, p.user_id) for p in batch)
+        by_kind = defaultdict(list)
+        for (kind, object_id, user_id), count in toggles.items():
+            if count % 2 and kind in LIKEABLE:
+                pk = LIKEABLE[kind]._meta.pk.to_python(object_id)
+                by_kind[kind].append((pk, user_id))
+
+        deltas = Counter()
+        for kind, flips in by_kind.items():
+            model = LIKEABLE[kind]
+            existing = set(
+                model.objects.filter(
+                    id__in={object_id for object_id, _ in flips}
+                ).values_list("id", flat=True)
+            )
+            for object_id, user_id in flips:
+                if object_id in existing:
+                    deltas[kind, object_id] += flip_like(model, user_id, object_id)
+
+        for (kind, object_id), delta in deltas.items():
+            if delta:
+                LIKEABLE[kind].objects.filter(id=object_id).update(
+                    likes_count=F("likes_count") + delta
+                )
+        PendingLike.objects.filter(id__in=[p.id for p in batch]).delete()
+
+    for kind, object_id in deltas:
+        obj = LIKEABLE[kind].objects.filter(id=object_id).first()
+        if obj is not None:
+            update_leaderboard(obj)
+            record_likes(obj, deltas[kind, object_id])
+    return len(batch)
@@ -2,9 +2,23 @@ from django import forms
 from django.forms import ModelForm
 
 from ..models import *
+from .tags import tag_registry
 
 
-class PostCreateForm(ModelForm):
+class CategoryChoicesMixin:
+    """
+    Render the `tags` choices from the in-process category registry.
+
+    The field keeps its queryset, so submitted categories are still checked
+    against the database; only rendering the checkboxes skips the query.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["tags"].choices = tag_registry.choices()
+
+
+class PostCreateForm(CategoryChoicesMixin, ModelForm):
     """
     A form class for creating new posts.
 
@@ -37,7 +51,7 @@ class PostCreateForm(ModelForm):
         }
 
 
-class PostEditForm(ModelForm):
+class PostEditForm(CategoryChoicesMixin, ModelForm):
     """
     A form class for editing the post.
 
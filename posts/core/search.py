@@ -0,0 +1,221 @@
+import re
+from typing import Iterable
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router, transaction
+
+from ..models import Comment, Post, SearchEntry
+from .feed import feed_queryset
+
+SEARCH_TABLE = "posts_search"
+
+TOKEN = re.compile(r"\w+")
+
+
+def search_available(using: str) -> bool:
+    """
+    Tell whether a database has the FTS5 index.
+
+    Migration 0020 only creates it on SQLite; elsewhere posts and comments
+    are not indexed and searches find nothing.
+
+    Args:
+        using (str): The database alias.
+
+    Returns:
+        bool: True if the database is SQLite.
+    """
+    return connections[using].vendor == "sqlite"
+
+
+def match_expression(query: str) -> str:
+    """
+    Turn free text typed by a user into an FTS5 MATCH expression.
+
+    Every word must match; the last one also matches as a prefix, so results
+    show up while the user is still typing. Words are quoted, so FTS5 syntax
+    in the input (`OR`, `NEAR`, `*`, column filters) is matched literally.
+
+    Args:
+        query (str): The search box input.
+
+    Returns:
+        str: The MATCH expression, empty when the query has no words.
+    """
+    words = [f'"{word}"' for word in TOKEN.findall(query)]
+    if words:
+        words[-1] += "*"
+    return " ".join(words)
+
+
+def _index(kind: str, rows: list[tuple]) -> None:
+    """
+    Add or replace the index entries of posts or comments.
+
+    Args:
+        kind (str): `SearchEntry.POST` or `SearchEntry.COMMENT`.
+        rows (list[tuple]): `(object_id, post_id, title, body, artist)` tuples.
+    """
+    if not rows or not search_available(DEFAULT_DB_ALIAS):
+        return
+    with transaction.atomic():
+        SearchEntry.objects.bulk_create(
+            [SearchEntry(kind=kind, object_id=row[0], post_id=row[1]) for row in rows],
+            ignore_conflicts=True,
+        )
+        entries = dict(
+            SearchEntry.objects.filter(
+                kind=kind, object_id__in=[row[0] for row in rows]
+            ).values_list("object_id", "id")
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+                [(entries[row[0]],) for row in rows],
+            )
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, body, artist)"
+                " VALUES (%s, %s, %s, %s)",
+                [
+                    (entries[object_id], title, body, artist or "")
+                    for object_id, _, title, body, artist in rows
+                ],
+            )
+
+
+def index_posts(posts: Iterable[Post]) -> None:
+    """
+    Index the title, caption and artist of posts, replacing their old entries.
+
+    Args:
+        posts (Iterable[Post]): The saved posts.
+    """
+    _index(
+        SearchEntry.POST,
+        [(post.id, post.id, post.title, post.body, post.artist) for post in posts],
+    )
+
+
+def index_comments(comments: Iterable[Comment]) -> None:
+    """
+    Index the body of comments, replacing their old entries.
+
+    Args:
+        comments (Iterable[Comment]): The saved comments.
+    """
+    _index(
+        SearchEntry.COMMENT,
+        [(c.id, c.parent_post_id, "", c.body, "") for c in comments],
+    )
+
+
+def unindex(entries) -> None:
+    """
+    Remove index entries and their text.
+
+    Args:
+        entries (QuerySet): The `SearchEntry` rows to remove.
+    """
+    if not search_available(DEFAULT_DB_ALIAS):
+        return
+    with transaction.atomic():
+        ids = list(entries.values_list("id", flat=True))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(i,) for i in ids]
+            )
+        SearchEntry.objects.filter(id__in=ids).delete()
+
+
+def rebuild_index() -> int:
+    """
+    Drop every index entry and index all posts and comments again.
+
+    The text is copied with `INSERT ... SELECT` statements, so this runs in
+    seconds even on large tables. The FTS5 table is merged into a single
+    b-tree afterwards, the fastest layout to query.
+
+    Returns:
+        int: The number of indexed posts and comments, 0 without an index.
+    """
+    if not search_available(DEFAULT_DB_ALIAS):
+        return 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute("DELETE FROM posts_searchentry")
+        cursor.execute(
+            "INSERT INTO posts_searchentry (kind, object_id, post_id)"
+            " SELECT %s, id, id FROM posts_post",
+            [SearchEntry.POST],
+        )
+        cursor.execute(
+            "INSERT INTO posts_searchentry (kind, object_id, post_id)"
+            " SELECT %s, id, parent_post_id FROM posts_comment",
+            [SearchEntry.COMMENT],
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, body, artist)"
+            " SELECT e.id, p.title, p.body, coalesce(p.artist, '')"
+            " FROM posts_searchentry e JOIN posts_post p ON p.id = e.object_id"
+            " WHERE e.kind = %s",
+            [SearchEntry.POST],
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, body, artist)"
+            " SELECT e.id, '', c.body, '' FROM posts_searchentry e"
+            " JOIN posts_comment c ON c.id = e.object_id WHERE e.kind = %s",
+            [SearchEntry.COMMENT],
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+    return SearchEntry.objects.count()
+
+
+def search(query: str, page: int = 1) -> tuple[list, bool]:
+    """
+    Find the posts and comments matching a query, best matches first.
+
+    Hits are ranked by BM25 with title matches weighted above artist and body
+    matches. One page of `(kind, id)` pairs is read from the FTS5 index, then
+    the posts and comments on it are loaded with what their cards render.
+
+    Args:
+        query (str): The search box input.
+        page (int, optional): The 1-based page number. Defaults to 1.
+
+    Returns:
+        tuple[list, bool]: The `(kind, object)` pairs of the posts and
+        comments on the page, in rank order, and whether there is a next page.
+    """
+    using = router.db_for_read(SearchEntry)
+    expression = match_expression(query)
+    if not expression or not search_available(using):
+        return [], False
+
+    size = settings.SEARCH_PAGE_SIZE
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"SELECT e.kind, e.object_id FROM {SEARCH_TABLE}"
+            f" JOIN posts_searchentry e ON e.id = {SEARCH_TABLE}.rowid"
+            f" WHERE {SEARCH_TABLE} MATCH %s ORDER BY rank LIMIT %s OFFSET %s",
+            [expression, size + 1, (page - 1) * size],
+        )
+        to_python = SearchEntry._meta.get_field("object_id").to_python
+        hits = [(kind, to_python(pk)) for kind, pk in cursor.fetchall()]
+
+    has_next = len(hits) > size
+    hits = hits[:size]
+    ids = {kind: [pk for k, pk in hits if k == kind] for kind, _ in hits}
+
+    found = {}
+    if SearchEntry.POST in ids:
+        posts = feed_queryset(Post.objects.filter(id__in=ids[SearchEntry.POST]))
+        found.update(((SearchEntry.POST, post.id), post) for post in posts)
+    if SearchEntry.COMMENT in ids:
+        comments = Comment.objects.filter(
+            id__in=ids[SearchEntry.COMMENT]
+        ).select_related("author__profile", "parent_post")
+        found.update(((SearchEntry.COMMENT, c.id), c) for c in comments)
+
+    return [(hit[0], found[hit]) for hit in hits if hit in found], has_next
@@ -0,0 +1,91 @@
+import random
+from collections import Counter
+
+from django.apps import apps as global_apps
+
+
+def seed_dataset(posts: int, users: int, apps=global_apps) -> None:
+    """
+    Fill the database with a large, skewed dataset of posts, comments and likes.
+
+    Only bulk inserts are used, so the historical models of a migration state
+    work as well as the current ones.
+
+    Args:
+        posts (int): The number of posts to create.
+        users (int): The number of users to create.
+        apps (Apps, optional): The registry to take the models from. Defaults
+            to the installed apps.
+    """
+    User = apps.get_model("auth", "User")
+    Profile = apps.get_model("users", "Profile")
+    Tag = apps.get_model("posts", "Tag")
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    Reply = apps.get_model("posts", "Reply")
+    LikedPost = apps.get_model("posts", "LikedPost")
+    LikedComment = apps.get_model("posts", "LikedComment")
+
+    rng = random.Random(0)
+    people = User.objects.bulk_create(
+        User(username=f"user{i}", email=f"user{i}@example.com") for i in range(users)
+    )
+    Profile.objects.bulk_create(Profile(user=user) for user in people)
+    tags = Tag.objects.bulk_create(
+        Tag(name=f"Tag {i}", slug=f"tag-{i}", order=i, image="icons/tag.svg")
+        for i in range(8)
+    )
+
+    created = [
+        Post(
+            title=f"Post {i}",
+            image="https://live.staticflickr.com/x.jpg",
+            body=f"Caption {i}",
+            url=f"https://www.flickr.com/photos/x/{i}/",
+            author=rng.choice(people),
+            likes_count=rng.randrange(50),
+        )
+        for i in range(posts)
+    ]
+    Post.objects.bulk_create(created, batch_size=1000)
+    PostTag = Post.tags.through
+    # Older migration states have no category index on the through table.
+    indexed = any(field.name == "created" for field in PostTag._meta.fields)
+    links = [PostTag(post=post, tag=rng.choice(tags)) for post in created]
+    if indexed:
+        for link in links:
+            link.created = link.post.created
+    PostTag.objects.bulk_create(links, batch_size=1000)
+    if indexed:
+        for tag, count in Counter(link.tag for link in links).items():
+            Tag.objects.filter(id=tag.id).update(post_count=count)
+
+    comments = [
+        Comment(
+            parent_post=post,
+            author=rng.choice(people),
+            body="Nice",
+            likes_count=rng.randrange(5),
+        )
+        for post in created[: posts // 4]
+        for _ in range(rng.randrange(1, 8))
+    ]
+    Comment.objects.bulk_create(comments, batch_size=1000)
+    Reply.objects.bulk_create(
+        (
+            Reply(parent_comment=comment, author=rng.choice(people), body="Thanks")
+            for comment in comments[::3]
+        ),
+        batch_size=1000,
+    )
+
+    liked = {(rng.choice(people).id, rng.choice(created).id) for _ in range(posts * 2)}
+    LikedPost.objects.bulk_create(
+        (LikedPost(user_id=user, post_id=post) for user, post in liked),
+        batch_size=1000,
+    )
+    liked = {(rng.choice(people).id, rng.choice(comments).id) for _ in range(posts)}
+    LikedComment.objects.bulk_create(
+        (LikedComment(user_id=user, comment_id=comment) for user, comment in liked),
+        batch_size=1000,
+    )
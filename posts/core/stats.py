@@ -0,0 +1,234 @@
+from typing import Iterable
+from uuid import UUID
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import models, transaction
+from django.db.models import F, Max, Sum, Window
+from django.db.models.functions import Greatest, RowNumber
+from django.utils import timezone
+
+from ..models import Comment, Post, Reply, UserStats
+
+TOP_LISTS = {Post: "top_posts", Comment: "top_comments"}
+AUTHORED = (Post, Comment, Reply)
+
+
+def user_stats(user: User) -> UserStats:
+    """
+    Return the statistics of a user, empty ones if they were never computed.
+
+    Args:
+        user (User): The user, ideally loaded with `select_related("stats")`.
+
+    Returns:
+        UserStats: The user's statistics.
+    """
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return UserStats(user=user)
+
+
+def top_ids(stats: UserStats, model: type) -> list[UUID]:
+    """
+    Return the ids on one of a user's top lists, most liked first.
+
+    Args:
+        stats (UserStats): The user's statistics.
+        model (type): `Post` or `Comment`.
+
+    Returns:
+        list[UUID]: The ids of the user's most liked posts or comments.
+    """
+    return [UUID(pk) for pk, _ in getattr(stats, TOP_LISTS[model])]
+
+
+def top_entries(objects: models.QuerySet, user_id: int) -> list[list]:
+    """
+    Read a user's most liked posts or comments from the indexed counter column.
+
+    Args:
+        objects (QuerySet): The candidate posts or comments.
+        user_id (int): The author.
+
+    Returns:
+        list[list]: `[id, likes]` pairs, most liked first.
+    """
+    top = objects.filter(author_id=user_id, likes_count__gt=0).order_by("-likes_count")
+    return [
+        [pk.hex, likes]
+        for pk, likes in top.values_list("id", "likes_count")[
+            : settings.USER_STATS_TOP_SIZE
+        ]
+    ]
+
+
+def update_top_list(obj: models.Model) -> None:
+    """
+    Apply the current `likes_count` of a post or comment to its author's top list.
+
+    Like `update_leaderboard`, an increase only needs to be compared with the
+    lowest entry, while a decrease of an entry may let another of the user's
+    posts or comments overtake it, in which case the list is reread.
+
+    Args:
+        obj (models.Model): A `Post` or `Comment` with an up to date
+            `likes_count`. Other objects (e.g. replies) are ignored.
+    """
+    if type(obj) not in TOP_LISTS or obj.author_id is None:
+        return
+    field = TOP_LISTS[type(obj)]
+
+    with transaction.atomic():
+        stats = UserStats.objects.select_for_update().filter(user_id=obj.author_id)
+        stats = stats.first()
+        if stats is None:
+            return
+        entries = getattr(stats, field)
+        entry = next((e for e in entries if e[0] == obj.id.hex), None)
+        if entry and obj.likes_count < entry[1]:
+            entries = top_entries(type(obj).objects, obj.author_id)
+        elif entry:
+            entry[1] = obj.likes_count
+        elif obj.likes_count:
+            entries.append([obj.id.hex, obj.likes_count])
+        entries.sort(key=lambda e: -e[1])
+        setattr(stats, field, entries[: settings.USER_STATS_TOP_SIZE])
+        stats.save(update_fields=[field])
+
+
+def record_likes(obj: models.Model, delta: int) -> None:
+    """
+    Count a change of the likes of a post, comment or reply for its author.
+
+    Args:
+        obj (models.Model): The Post, Comment or Reply, with its `likes_count`
+            already updated.
+        delta (int): The change to its likes.
+    """
+    if not delta or obj.author_id is None:
+        return
+    UserStats.objects.filter(user_id=obj.author_id).update(
+        likes_received=Greatest(F("likes_received") + delta, 0)
+    )
+    update_top_list(obj)
+
+
+def record_posts(user_id: int, count: int) -> None:
+    """
+    Count new posts of a user and mark them active.
+
+    Args:
+        user_id (int): The author.
+        count (int): The number of new posts.
+    """
+    UserStats.objects.filter(user_id=user_id).update(
+        posts_count=F("posts_count") + count, last_active=timezone.now()
+    )
+
+
+def record_created(obj: models.Model) -> None:
+    """
+    Count a new post, comment or reply for its author.
+
+    Args:
+        obj (models.Model): The created Post, Comment or Reply.
+    """
+    if obj.author_id is None:
+        return
+    if isinstance(obj, Post):
+        record_posts(obj.author_id, 1)
+    else:
+        UserStats.objects.filter(user_id=obj.author_id).update(
+            last_active=timezone.now()
+        )
+
+
+def record_deleted(obj: models.Model) -> None:
+    """
+    Remove a deleted post, comment or reply from its author's statistics.
+
+    Called after the row is gone, the top list is reread without it. Django
+    deletes each model's rows of a cascade in one batch before sending their
+    signals, so the comments of a deleted post are all gone by the time the
+    first one is recorded.
+
+    Args:
+        obj (models.Model): The Post, Comment or Reply, no longer in the database.
+    """
+    if obj.author_id is None:
+        return
+    stats = UserStats.objects.filter(user_id=obj.author_id)
+    stats.update(
+        posts_count=Greatest(F("posts_count") - int(isinstance(obj, Post)), 0),
+        likes_received=Greatest(F("likes_received") - obj.likes_count, 0),
+    )
+    if type(obj) in TOP_LISTS and obj.likes_count:
+        field = TOP_LISTS[type(obj)]
+        stats.update(**{field: top_entries(type(obj).objects, obj.author_id)})
+
+
+def rebuild_user_stats(user_ids: Iterable[int] = None) -> int:
+    """
+    Recompute the statistics of users from the content tables.
+
+    Totals are aggregated per author in one query per table, and the top
+    lists are read with a window function ranking each author's posts and
+    comments, so the cost does not depend on the number of users.
+
+    Args:
+        user_ids (Iterable[int], optional): The users to recompute. Defaults
+            to None, which recomputes every user.
+
+    Returns:
+        int: The number of users.
+    """
+    users, rows = User.objects.all(), UserStats.objects.all()
+    authored = {"author__isnull": False}
+    if user_ids is not None:
+        users = users.filter(id__in=list(user_ids))
+        rows = rows.filter(user__in=users)
+        authored = {"author__in": users}
+    stats = {pk: UserStats(user_id=pk) for pk in users.values_list("id", flat=True)}
+
+    for model in AUTHORED:
+        totals = (
+            model.objects.filter(**authored)
+            .values("author")
+            .annotate(
+                rows=models.Count("id"),
+                likes=Sum("likes_count"),
+                latest=Max("created"),
+            )
+            .order_by()
+        )
+        for row in totals:
+            entry = stats[row["author"]]
+            if model is Post:
+                entry.posts_count = row["rows"]
+            entry.likes_received += row["likes"]
+            if entry.last_active is None or row["latest"] > entry.last_active:
+                entry.last_active = row["latest"]
+
+    for model, field in TOP_LISTS.items():
+        ranked = (
+            model.objects.filter(**authored, likes_count__gt=0)
+            .annotate(
+                rank=Window(
+                    RowNumber(),
+                    partition_by=F("author"),
+                    order_by=F("likes_count").desc(),
+                )
+            )
+            .filter(rank__lte=settings.USER_STATS_TOP_SIZE)
+            .order_by("author", "rank")
+            .values_list("author", "id", "likes_count")
+        )
+        for author, pk, likes in ranked:
+            getattr(stats[author], field).append([pk.hex, likes])
+
+    with transaction.atomic():
+        rows.delete()
+        UserStats.objects.bulk_create(stats.values())
+    return len(stats)
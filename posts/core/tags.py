@@ -0,0 +1,129 @@
+import threading
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from ..models import Tag
+
+VERSION_KEY = "tags:version"
+COUNTS_KEY = "tags:counts"
+
+
+class CachedTag:
+    """
+    The read-only view of a category that pages render.
+
+    Args:
+        tag (Tag): The category as loaded from the database.
+    """
+
+    def __init__(self, tag: Tag):
+        self.id = self.pk = tag.id
+        self.slug = tag.slug
+        self.name = tag.name
+        self.order = tag.order
+        self.icon = tag.image.url if tag.image else ""
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class TagRegistry:
+    """
+    An in-process copy of every category, loaded once per worker.
+
+    Categories are read by the sidebar of every page, by the post forms and
+    by the category feed, and almost never change. The copy is tagged with a
+    version stamp kept in the cache; `bump_tags_version` replaces the stamp
+    whenever a category is saved or deleted, and every worker reloads its
+    copy the next time it sees a stamp it did not load. The stamp expires
+    after `TAGS_VERSION_TTL` seconds, so with a per-process cache, where other
+    workers never see the bump, their copies are still at most that old.
+    Post counts change with every post and are read by `post_counts`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._tags = []
+        self._by_slug = {}
+
+    def _current(self) -> tuple[list[CachedTag], dict[str, CachedTag]]:
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid4().hex, settings.TAGS_VERSION_TTL)
+            version = cache.get(VERSION_KEY)
+        with self._lock:
+            if version != self._version:
+                # Always from the primary: a lagging replica would be cached
+                # under the new stamp until the next change.
+                tags = Tag.objects.using(DEFAULT_DB_ALIAS)
+                self._tags = [CachedTag(tag) for tag in tags]
+                self._by_slug = {tag.slug: tag for tag in self._tags}
+                self._version = version
+            return self._tags, self._by_slug
+
+    def all(self) -> list[CachedTag]:
+        """
+        Return every category in display order.
+
+        Returns:
+            list[CachedTag]: The categories.
+        """
+        return self._current()[0]
+
+    def get(self, slug: str) -> CachedTag | None:
+        """
+        Look up a category by its slug.
+
+        Args:
+            slug (str): The slug from the URL.
+
+        Returns:
+            CachedTag | None: The category, or None if there is none.
+        """
+        return self._current()[1].get(slug)
+
+    def choices(self) -> list[tuple[int, str]]:
+        """
+        Return the `(id, name)` pairs of the categories for a form field.
+
+        Returns:
+            list[tuple[int, str]]: The choices in display order.
+        """
+        return [(tag.id, tag.name) for tag in self.all()]
+
+
+tag_registry = TagRegistry()
+
+
+def post_counts() -> dict[int, int]:
+    """
+    Return the number of posts of every category, at most `TAG_COUNTS_TTL` seconds old.
+
+    Returns:
+        dict[int, int]: The post counts keyed by category id.
+    """
+    counts = cache.get(COUNTS_KEY)
+    if counts is None:
+        counts = dict(Tag.objects.values_list("id", "post_count"))
+        cache.set(COUNTS_KEY, counts, settings.TAG_COUNTS_TTL)
+    return counts
+
+
+def bump_tags_version() -> None:
+    """
+    Make every worker reload its copy of the categories on its next read.
+
+    The stamp is replaced right away, so the writing request sees its own
+    change, and again once the transaction commits, so a worker that
+    reloaded in between does not keep the uncommitted state.
+    """
+
+    def bump():
+        cache.set(VERSION_KEY, uuid4().hex, settings.TAGS_VERSION_TTL)
+
+    bump()
+    transaction.on_commit(bump)
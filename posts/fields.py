@@ -0,0 +1,68 @@
+import uuid
+
+from django.db import models
+
+
+class CompactUUIDField(models.UUIDField):
+    """
+    A UUID stored in 16 bytes on every backend.
+
+    Django's `UUIDField` is a native `uuid` column on PostgreSQL but a 32
+    character string on SQLite. This field keeps the native type where there
+    is one and stores the raw bytes in a BLOB column on SQLite, which also
+    shrinks every foreign key, through-table row and index that refers to it.
+    Byte order matches the canonical string order, so sorting and keyset
+    comparisons behave as they did on the string keys.
+    """
+
+    def db_type(self, connection) -> str:
+        if connection.vendor == "sqlite":
+            return "blob"
+        return connection.data_types["UUIDField"]
+
+    def rel_db_type(self, connection) -> str:
+        return self.db_type(connection)
+
+    def get_internal_type(self) -> str:
+        # Not "UUIDField": the SQLite backend would try to parse the bytes as hex.
+        return "CompactUUIDField"
+
+    def to_python(self, value):
+        if isinstance(value, bytes):
+            # Raw column values, e.g. the keys read back by an m2m prefetch.
+            return uuid.UUID(bytes=value)
+        return super().to_python(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = self.to_python(value)
+        if connection.vendor == "sqlite":
+            return value.bytes
+        return super().get_db_prep_value(value, connection, prepared)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        if isinstance(value, bytes):
+            return uuid.UUID(bytes=value)
+        return uuid.UUID(value)
+
+
+class PostCreatedField(models.DateTimeField):
+    """
+    A copy of the creation time of the row's `post`, filled in on insert.
+
+    Many-to-many rows are created by `tags.add()`, `tags.set()`, forms and the
+    admin, none of which can compute a column from the post. `pre_save` runs
+    for single saves and `bulk_create` alike, so the copy is made there unless
+    a value was given, e.g. through `through_defaults`, which saves a query.
+    """
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if value is None and add:
+            value = model_instance.post.created
+            setattr(model_instance, self.attname, value)
+        return value
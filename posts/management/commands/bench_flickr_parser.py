@@ -0,0 +1,94 @@
+import codecs
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.core.flickr import extract_flickr_metadata, parse_flickr_metadata
+
+
+def read_chunks(data: bytes, chunk_size: int, consumed: list):
+    """
+    Decode a saved page in chunks, the way a streamed response is read.
+
+    Args:
+        data (bytes): The raw page.
+        chunk_size (int): The number of bytes per chunk.
+        consumed (list): Receives the number of bytes handed out so far.
+
+    Yields:
+        str: The decoded text of each chunk.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    for start in range(0, len(data), chunk_size):
+        consumed[0] = min(start + chunk_size, len(data))
+        yield decoder.decode(data[start : start + chunk_size])
+    yield decoder.decode(b"", final=True)
+
+
+class Command(BaseCommand):
+    """
+    Compare the BeautifulSoup metadata parser with the streaming extractor.
+
+    For each saved Flickr photo page, both paths are run `--repeat` times to
+    measure CPU time, then once more under `tracemalloc` to measure their peak
+    memory. The streaming path also reports how much of the page it had to
+    read before all fields were found.
+    """
+
+    help = "Benchmark Flickr metadata extraction on saved photo pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("pages", nargs="+", help="Saved Flickr photo pages.")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--chunk-size", type=int, default=16384)
+
+    def measure(self, func, repeat: int) -> tuple[float, int]:
+        start = time.process_time()
+        for _ in range(repeat):
+            func()
+        cpu = (time.process_time() - start) / repeat
+
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return cpu, peak
+
+    def handle(self, *args, **options):
+        repeat, chunk_size = options["repeat"], options["chunk_size"]
+
+        for page in options["pages"]:
+            path = Path(page)
+            if not path.is_file():
+                raise CommandError(f"No such file: {page}")
+            data = path.read_bytes()
+            consumed = [0]
+
+            def soup():
+                return parse_flickr_metadata(data.decode("utf-8", "replace"), page)
+
+            def stream():
+                return extract_flickr_metadata(
+                    read_chunks(data, chunk_size, consumed), page
+                )
+
+            if soup() != stream():
+                raise CommandError(f"{page}: the two parsers disagree")
+
+            soup_cpu, soup_peak = self.measure(soup, repeat)
+            stream_cpu, stream_peak = self.measure(stream, repeat)
+
+            self.stdout.write(f"{page} ({len(data) / 1024:.0f} KiB)")
+            self.stdout.write(
+                f"  beautifulsoup  cpu {soup_cpu * 1000:8.2f} ms"
+                f"  peak {soup_peak / 1024:8.0f} KiB  read {len(data) / 1024:6.0f} KiB"
+            )
+            self.stdout.write(
+                f"  streaming      cpu {stream_cpu * 1000:8.2f} ms"
+                f"  peak {stream_peak / 1024:8.0f} KiB  read {consumed[0] / 1024:6.0f} KiB"
+            )
+            self.stdout.write(
+                f"  speedup x{soup_cpu / stream_cpu:.1f}, memory x{soup_peak / stream_peak:.1f}"
+            )
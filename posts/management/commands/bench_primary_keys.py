@@ -0,0 +1,95 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from posts.core.seed import seed_dataset
+
+STRING_KEYS = ("posts", "0018_comment_comment_post_created_idx_and_more")
+COMPACT_KEYS = ("posts", "0019_alter_comment_id_alter_post_id_alter_reply_id")
+
+JOIN_QUERIES = {
+    "liked posts with authors": """
+        SELECT p.title, u.username FROM posts_likedpost lp
+        JOIN posts_post p ON p.id = lp.post_id
+        JOIN auth_user u ON u.id = p.author_id
+        ORDER BY lp.created DESC
+    """,
+    "posts > comments > replies": """
+        SELECT COUNT(*) FROM posts_post p
+        JOIN posts_comment c ON c.parent_post_id = p.id
+        JOIN posts_reply r ON r.parent_comment_id = c.id
+    """,
+    "tagged posts > likes": """
+        SELECT pt.tag_id, COUNT(*) FROM posts_post_tags pt
+        JOIN posts_post p ON p.id = pt.post_id
+        JOIN posts_likedpost lp ON lp.post_id = p.id
+        GROUP BY pt.tag_id
+    """,
+}
+
+
+class Command(BaseCommand):
+    """
+    Measure the storage and join cost of the Post, Comment and Reply keys.
+
+    A throwaway test database is migrated back to the string keys and seeded,
+    then measured; the compact key migration is applied to the same data and
+    the measurements are repeated. Sizes come from SQLite's `dbstat` table
+    after a VACUUM, times are the best of `--repeat` runs.
+    """
+
+    help = "Compare string and compact primary keys on a large seeded database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=50000)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            state = MigrationExecutor(connection).migrate([STRING_KEYS])
+            self.stdout.write(f"Seeding {options['posts']} posts ...")
+            seed_dataset(options["posts"], options["users"], apps=state.apps)
+            before = self.measure(options["repeat"])
+
+            MigrationExecutor(connection).migrate([COMPACT_KEYS])
+            after = self.measure(options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(f"{'':34}{'string':>12}{'compact':>12}{'change':>9}")
+        for label in before:
+            old, new = before[label], after[label]
+            unit = "ms" if label in JOIN_QUERIES else "KiB"
+            self.stdout.write(
+                f"{label + ' (' + unit + ')':34}{old:12.1f}{new:12.1f}"
+                f"{(new - old) / old * 100:+8.0f}%"
+            )
+
+    def measure(self, repeat: int) -> dict[str, float]:
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM")
+            cursor.execute("ANALYZE")
+            cursor.execute(
+                "SELECT name IN (SELECT name FROM sqlite_schema WHERE type = 'index'),"
+                " SUM(pgsize) FROM dbstat GROUP BY name"
+            )
+            sizes = {"tables": 0, "indexes": 0}
+            for is_index, size in cursor.fetchall():
+                sizes["indexes" if is_index else "tables"] += size / 1024
+
+            timings = {}
+            for label, sql in JOIN_QUERIES.items():
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    cursor.execute(sql)
+                    cursor.fetchall()
+                    best = min(best, time.perf_counter() - start)
+                timings[label] = best * 1000
+        return sizes | timings
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from posts.core.search import rebuild_index, search
+from posts.core.seed import seed_dataset
+from posts.models import Comment, Post
+
+# From a word in every post title, to a word in every comment, to a rare and
+# a missing one.
+QUERIES = ["post", "nice", "caption 12", "post 4242", "sunset"]
+
+
+class Command(BaseCommand):
+    """
+    Compare the latency of full-text search with `icontains` scans as data grows.
+
+    A throwaway test database is seeded for each size, the search index is
+    rebuilt and every query in `QUERIES` is run through `search()` and as
+    the equivalent `icontains` filter over posts and comments. Times are the
+    best of `--repeat` runs.
+    """
+
+    help = "Benchmark full-text search latency against table size."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1000, 10000, 50000]
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def best_of(self, repeat: int, run: callable) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        return best * 1000
+
+    def scan(self, query: str) -> None:
+        posts, comments = Q(), Q()
+        for word in query.split():
+            posts &= (
+                Q(title__icontains=word)
+                | Q(body__icontains=word)
+                | Q(artist__icontains=word)
+            )
+            comments &= Q(body__icontains=word)
+        list(Post.objects.filter(posts).order_by("-created")[:10])
+        list(Comment.objects.filter(comments).order_by("-created")[:10])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'posts':>8}  {'query':12}{'fts5 ms':>10}{'scan ms':>10}")
+        for size in sorted(options["sizes"]):
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                seed_dataset(size, max(10, size // 100))
+                rebuild_index()
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+                for query in QUERIES:
+                    fts = self.best_of(options["repeat"], lambda: search(query))
+                    scan = self.best_of(options["repeat"], lambda: self.scan(query))
+                    self.stdout.write(f"{size:>8}  {query:12}{fts:>10.2f}{scan:>10.2f}")
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,133 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from posts.core import feed_queryset, paginate_feed
+from posts.core.leaderboard import rebuild_leaderboard
+from posts.core.seed import seed_dataset
+from posts.core.stats import rebuild_user_stats
+from posts.models import Comment, Post, Reply
+
+# Tables small enough by design that scanning and sorting them is fine.
+SMALL_TABLES = {"posts_tag", "posts_toppost", "posts_topcomment"}
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)\b(?! USING)")
+TEMP_SORT = re.compile(r"USE TEMP B-TREE")
+TABLE = re.compile(r"^(?:SCAN|SEARCH) (\w+)")
+
+
+def slow_steps(sql: str) -> list[str]:
+    """
+    Return the steps of a query's plan that scan or sort a large table.
+
+    A sort is allowed when its input is bounded: when the query is driven by
+    one of the small tables, or is a prefetch, which only reads the related
+    rows of the objects already on the page.
+
+    Args:
+        sql (str): A SELECT statement with its parameters inlined.
+
+    Returns:
+        list[str]: The offending `EXPLAIN QUERY PLAN` lines.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        plan = [row[3] for row in cursor.fetchall()]
+
+    tables = [TABLE.match(detail)[1] for detail in plan if TABLE.match(detail)]
+    driven_by_small_table = bool(tables) and tables[0] in SMALL_TABLES
+    bounded = driven_by_small_table or "_prefetch_related_val_" in sql
+
+    steps = []
+    for detail in plan:
+        scan = FULL_SCAN.match(detail)
+        if scan and scan[1] not in SMALL_TABLES:
+            steps.append(detail)
+        elif TEMP_SORT.search(detail) and not bounded:
+            steps.append(detail)
+    return steps
+
+
+class Command(BaseCommand):
+    """
+    Check that the queries behind the feed, post and profile views use indexes.
+
+    A throwaway test database is seeded with a large dataset, every view is
+    requested once with its queries captured, and `EXPLAIN QUERY PLAN` is run
+    for each SELECT. The command fails when a query scans a whole large table
+    or sorts its rows in a temporary B-tree instead of reading them in index
+    order.
+    """
+
+    help = "Fail if a hot view query falls back to a full scan or a temp sort."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=20000)
+        parser.add_argument("--users", type=int, default=200)
+
+    def requests(self) -> list[tuple[str, str, dict]]:
+        comment = Reply.objects.order_by("parent_comment").first().parent_comment
+        post = comment.parent_post
+        author = post.author
+        _, cursor = paginate_feed(feed_queryset())
+        htmx = {"HTTP_HX_REQUEST": "true"}
+        return [
+            ("home", "/", {}),
+            ("home next page", f"/?cursor={cursor}", htmx),
+            ("category", "/category/tag-1/", {}),
+            ("post page", f"/post/{post.id}/", {}),
+            ("post comments", f"/post/{post.id}/", htmx),
+            ("post top comments", f"/post/{post.id}/?top", htmx),
+            ("comment replies", f"/comment/{comment.id}/replies/", htmx),
+            ("profile", f"/{author.username}/", {}),
+            ("profile top posts", f"/{author.username}/?top-posts", htmx),
+            ("profile top comments", f"/{author.username}/?top-comments", htmx),
+            ("profile liked posts", f"/{author.username}/?liked-posts", htmx),
+        ]
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            self.stdout.write(f"Seeding {options['posts']} posts ...")
+            seed_dataset(options["posts"], options["users"])
+            rebuild_leaderboard(Post)
+            rebuild_leaderboard(Comment)
+            rebuild_user_stats()
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            failures = self.check_views()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if failures:
+            raise CommandError(f"{failures} queries without a usable index")
+        self.stdout.write(self.style.SUCCESS("All view queries use indexes"))
+
+    def check_views(self) -> int:
+        client = Client()
+        client.force_login(User.objects.order_by("id").last())
+        failures = 0
+
+        for label, path, headers in self.requests():
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path, **headers)
+            if response.status_code != 200:
+                raise CommandError(f"{label}: {path} returned {response.status_code}")
+
+            selects = [q["sql"] for q in queries if q["sql"].startswith("SELECT")]
+            self.stdout.write(f"{label} ({len(selects)} queries)")
+            for sql in selects:
+                steps = slow_steps(sql)
+                if steps:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f"  {sql[:200]}"))
+                    for step in steps:
+                        self.stdout.write(self.style.ERROR(f"    {step}"))
+
+        return failures
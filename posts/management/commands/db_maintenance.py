@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+# `PRAGMA auto_vacuum` value of a database that frees pages on request.
+INCREMENTAL = 2
+
+
+class Command(BaseCommand):
+    """
+    Keep a long-running SQLite database fast.
+
+    Refreshes the query planner statistics, checkpoints the write-ahead log
+    back into the database file and truncates it, and returns free pages to
+    the file system. Free pages can only be released incrementally once the
+    database has been switched to `auto_vacuum = INCREMENTAL`, which takes a
+    full VACUUM; `--enable-incremental-vacuum` does that once.
+    """
+
+    help = "Run ANALYZE, PRAGMA optimize, a WAL checkpoint and an incremental vacuum."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--enable-incremental-vacuum",
+            action="store_true",
+            help="Switch the database to incremental auto-vacuum (rewrites the file).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("db_maintenance only supports SQLite")
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA auto_vacuum")
+            if cursor.fetchone()[0] != INCREMENTAL:
+                if options["enable_incremental_vacuum"]:
+                    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                    cursor.execute("VACUUM")
+                    self.stdout.write("Switched to incremental auto-vacuum")
+                else:
+                    self.stdout.write(
+                        "Incremental vacuum is off; run once with "
+                        "--enable-incremental-vacuum to turn it on"
+                    )
+
+            cursor.execute("ANALYZE")
+            cursor.execute("PRAGMA optimize")
+            self.stdout.write("Statistics updated")
+
+            cursor.execute("PRAGMA freelist_count")
+            free = cursor.fetchone()[0]
+            cursor.execute("PRAGMA auto_vacuum")
+            if cursor.fetchone()[0] == INCREMENTAL:
+                cursor.execute("PRAGMA incremental_vacuum")
+                cursor.fetchall()  # the pages are freed as the pragma is stepped
+                self.stdout.write(f"{free} free pages released")
+
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            busy, log, checkpointed = cursor.fetchone()
+            if busy:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"WAL checkpoint blocked by readers: "
+                        f"{checkpointed} of {log} pages copied"
+                    )
+                )
+            elif log >= 0:
+                self.stdout.write(f"WAL checkpointed ({checkpointed} pages)")
+
+        self.stdout.write(self.style.SUCCESS("Database maintenance done"))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.core.likes import flush_pending_likes
+
+
+class Command(BaseCommand):
+    """
+    Apply the like toggles staged while `LIKE_BUFFER` is enabled.
+
+    Each batch is written in a single transaction, so a burst of likes on a hot
+    post costs one short write instead of one per request. Keep it running for
+    as long as the buffer is enabled, and let it drain the buffer with `--once`
+    after disabling it.
+    """
+
+    help = "Flush buffered like toggles to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the buffer is empty instead of waiting for new toggles.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between flushes.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = flush_pending_likes()
+            if flushed:
+                self.stdout.write(f"Flushed {flushed} like toggles")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["sleep"])
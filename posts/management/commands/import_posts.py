@@ -0,0 +1,172 @@
+import csv
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from posts.core.flickr import FlickrClient, normalize_photo_url
+from posts.core.search import index_posts
+from posts.core.stats import record_posts
+from posts.models import Post, PostTag, Tag
+
+
+class Command(BaseCommand):
+    """
+    Create posts in bulk from a file of Flickr photo urls.
+
+    Each row of the CSV file holds a photo url, a caption and the slugs of the
+    post's categories separated by spaces, e.g.:
+
+        https://www.flickr.com/photos/owner/123/,A caption,animals urban
+
+    The metadata of photos that were already posted is reused; the others are
+    resolved concurrently by a bounded pool of threads sharing one pooled
+    `FlickrClient`. Posts and their category links are inserted with
+    `bulk_create` in batches, and rows that cannot be resolved are reported.
+    """
+
+    help = "Import posts from a CSV file of url, caption and category rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="CSV file of url,caption,tags rows.")
+        parser.add_argument(
+            "--author", required=True, help="Username of the posts' author."
+        )
+        parser.add_argument(
+            "--workers", type=int, default=8, help="Concurrent Flickr fetches."
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=100, help="Posts inserted per batch."
+        )
+
+    def read_rows(self, path: str, tags: dict) -> list[tuple[str, str, list]]:
+        """
+        Parse the CSV file into `(url, caption, tag ids)` rows.
+
+        Args:
+            path (str): The CSV file.
+            tags (dict): The id of each known tag, keyed by slug.
+
+        Returns:
+            list[tuple[str, str, list]]: The rows, with normalized urls.
+
+        Raises:
+            CommandError: If the file cannot be read or names an unknown category.
+        """
+        rows = []
+        try:
+            with open(path, newline="", encoding="utf-8") as file:
+                for line, row in enumerate(csv.reader(file), start=1):
+                    if not row or row[0].startswith("#"):
+                        continue
+                    url, caption, slugs = (row + ["", ""])[:3]
+                    unknown = [slug for slug in slugs.split() if slug not in tags]
+                    if unknown:
+                        raise CommandError(f"Line {line}: unknown category {unknown}")
+                    rows.append(
+                        (
+                            normalize_photo_url(url),
+                            caption.strip(),
+                            [tags[slug] for slug in slugs.split()],
+                        )
+                    )
+        except OSError as error:
+            raise CommandError(error)
+        return rows
+
+    def insert(self, batch: list[tuple[Post, list]]) -> None:
+        """
+        Insert a batch of posts, their category links and search entries, and
+        add them to the categories' post counts and the author's statistics.
+
+        Args:
+            batch (list[tuple[Post, list]]): The unsaved posts and their tag ids.
+        """
+        with transaction.atomic():
+            Post.objects.bulk_create([post for post, _ in batch])
+            PostTag.objects.bulk_create(
+                PostTag(post_id=post.id, tag_id=tag_id, created=post.created)
+                for post, tag_ids in batch
+                for tag_id in tag_ids
+            )
+            added = Counter(tag_id for _, tag_ids in batch for tag_id in tag_ids)
+            for tag_id, count in added.items():
+                Tag.objects.filter(id=tag_id).update(post_count=F("post_count") + count)
+            index_posts(post for post, _ in batch)
+            record_posts(batch[0][0].author_id, len(batch))
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options["author"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['author']}")
+
+        tags = dict(Tag.objects.values_list("slug", "id"))
+        rows = self.read_rows(options["file"], tags)
+        urls = {url for url, _, _ in rows}
+
+        started = time.monotonic()
+        metadata = {}
+        for known in (
+            Post.objects.filter(url__in=urls, status=Post.READY)
+            .values("url", "image", "title", "artist")
+            .order_by()
+        ):
+            metadata[known.pop("url")] = known
+
+        failures = {}
+        client = FlickrClient(
+            timeout=settings.FLICKR_TIMEOUT,
+            pool_size=options["workers"],
+            failure_threshold=settings.FLICKR_FAILURE_THRESHOLD,
+            reset_timeout=settings.FLICKR_RESET_TIMEOUT,
+        )
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            futures = {
+                executor.submit(client.fetch_metadata, url): url
+                for url in urls - metadata.keys()
+            }
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    metadata[url] = future.result()
+                except Exception as error:
+                    failures[url] = f"{type(error).__name__}: {error}"
+        fetched = time.monotonic() - started
+
+        imported = 0
+        batch = []
+        for url, caption, tag_ids in rows:
+            if url not in metadata:
+                continue
+            batch.append(
+                (Post(url=url, body=caption, author=author, **metadata[url]), tag_ids)
+            )
+            if len(batch) >= options["batch_size"]:
+                self.insert(batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            self.insert(batch)
+            imported += len(batch)
+        elapsed = time.monotonic() - started
+
+        for url, error in failures.items():
+            self.stderr.write(f"Failed {url}: {error}")
+        self.stdout.write(
+            f"{len(rows)} rows, {len(urls)} distinct photos: "
+            f"{len(urls) - len(failures)} resolved in {fetched:.2f}s "
+            f"({(len(urls) - len(failures)) / max(fetched, 1e-6):.1f} photos/s), "
+            f"{len(failures)} failed"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} posts in {elapsed:.2f}s "
+                f"({imported / max(elapsed, 1e-6):.1f} posts/s)"
+            )
+        )
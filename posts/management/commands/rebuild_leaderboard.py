@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.core.leaderboard import rebuild_leaderboard
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the top posts and top comments leaderboards shown in the sidebar.
+
+    The leaderboards are maintained incrementally on every like and unlike;
+    running this command periodically corrects any drift, e.g. after posts or
+    comments on the board were deleted.
+    """
+
+    help = "Rebuild the sidebar's top posts and top comments leaderboards."
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            entries = rebuild_leaderboard(model)
+            self.stdout.write(f"{model.__name__}: {entries} entries")
+
+        self.stdout.write(self.style.SUCCESS("Leaderboards rebuilt"))
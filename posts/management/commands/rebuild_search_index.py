@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.core.search import rebuild_index
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the full-text search index of posts and comments.
+
+    The index is kept in sync by model signals and by the jobs and commands
+    that write posts in bulk; run this after changing rows behind their back,
+    e.g. with raw SQL or `QuerySet.update()` on indexed text.
+    """
+
+    help = "Rebuild the full-text search index of posts and comments."
+
+    def handle(self, *args, **options):
+        entries = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {entries} posts and comments"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.core.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the per-user statistics shown on profile pages.
+
+    The statistics are maintained incrementally on every post, comment,
+    reply, like and unlike; running this command periodically corrects any
+    drift, e.g. after content was deleted in bulk.
+    """
+
+    help = "Recompute every user's post and like totals and top lists."
+
+    def handle(self, *args, **options):
+        users = rebuild_user_stats()
+        self.stdout.write(self.style.SUCCESS(f"Statistics rebuilt for {users} users"))
@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import (
+    Comment,
+    LikedComment,
+    LikedPost,
+    LikedReply,
+    Post,
+    PostTag,
+    Reply,
+    Tag,
+)
+
+
+def count_of(model: type, field: str) -> Coalesce:
+    """
+    Build a correlated subquery counting the `model` rows that point at the outer row.
+
+    Args:
+        model (type): The model holding the foreign key, e.g. `LikedPost`.
+        field (str): The name of the foreign key on `model`, e.g. `post`.
+
+    Returns:
+        Coalesce: An expression evaluating to the number of matching rows (0 if none).
+    """
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    """
+    Recompute the denormalized counters on `Post`, `Comment`, `Reply` and `Tag`.
+
+    The counters are maintained incrementally by the views and signals; this
+    command recounts them from the `LikedPost`, `LikedComment`, `LikedReply`
+    and `PostTag` through tables (and the comment and reply tables) to correct
+    any drift.
+    """
+
+    help = (
+        "Recompute like, comment, reply and category counters from their source tables."
+    )
+
+    def handle(self, *args, **options):
+        counters = [
+            (
+                Post,
+                {
+                    "likes_count": count_of(LikedPost, "post"),
+                    "comments_count": count_of(Comment, "parent_post"),
+                },
+            ),
+            (
+                Comment,
+                {
+                    "likes_count": count_of(LikedComment, "comment"),
+                    "replies_count": count_of(Reply, "parent_comment"),
+                },
+            ),
+            (Reply, {"likes_count": count_of(LikedReply, "reply")}),
+            (Tag, {"post_count": count_of(PostTag, "tag")}),
+        ]
+
+        with transaction.atomic():
+            for model, fields in counters:
+                actual = {f"actual_{name}": expr for name, expr in fields.items()}
+                drifted = Q()
+                for name in fields:
+                    drifted |= ~Q(**{name: F(f"actual_{name}")})
+                ids = (
+                    model.objects.annotate(**actual)
+                    .filter(drifted)
+                    .values_list("id", flat=True)
+                )
+                repaired = model.objects.filter(id__in=ids).update(**fields)
+                self.stdout.write(f"{model.__name__}: {repaired} rows repaired")
+
+        self.stdout.write(self.style.SUCCESS("Counters are up to date"))
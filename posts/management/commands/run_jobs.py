@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.core.jobs import claim_job, run_job
+
+
+class Command(BaseCommand):
+    """
+    Process the background job queue, e.g. resolving the Flickr metadata of new posts.
+
+    Several workers may run side by side: each job is leased to exactly one of
+    them, and a job whose worker dies is picked up again once its lease expires.
+    """
+
+    help = "Run the background job worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for new ones.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls of an empty queue.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_job()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+
+            run_job(job)
+            self.stdout.write(f"{job}")
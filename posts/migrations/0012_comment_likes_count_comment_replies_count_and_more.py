@@ -0,0 +1,75 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:16
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field):
+    """Return a correlated subquery counting `model` rows whose `field` is the outer row."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def populate_counters(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    Reply = apps.get_model("posts", "Reply")
+    LikedPost = apps.get_model("posts", "LikedPost")
+    LikedComment = apps.get_model("posts", "LikedComment")
+    LikedReply = apps.get_model("posts", "LikedReply")
+
+    Post.objects.update(
+        likes_count=count_of(LikedPost, "post"),
+        comments_count=count_of(Comment, "parent_post"),
+    )
+    Comment.objects.update(
+        likes_count=count_of(LikedComment, "comment"),
+        replies_count=count_of(Reply, "parent_comment"),
+    )
+    Reply.objects.update(likes_count=count_of(LikedReply, "reply"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0011_likedreply_reply_likes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="replies_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="reply",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
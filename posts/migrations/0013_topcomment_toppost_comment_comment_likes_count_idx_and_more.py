@@ -0,0 +1,78 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_leaderboards(apps, schema_editor):
+    for model_name, board_name, field in [
+        ("Post", "TopPost", "post"),
+        ("Comment", "TopComment", "comment"),
+    ]:
+        model = apps.get_model("posts", model_name)
+        board = apps.get_model("posts", board_name)
+        top = model.objects.filter(likes_count__gt=0).order_by(
+            "-likes_count", "-created"
+        )[: settings.LEADERBOARD_SIZE]
+        board.objects.bulk_create(
+            board(**{field: obj}, score=obj.likes_count) for obj in top
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0012_comment_likes_count_comment_replies_count_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TopComment",
+            fields=[
+                (
+                    "comment",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="posts.comment",
+                    ),
+                ),
+                ("score", models.PositiveIntegerField()),
+            ],
+            options={
+                "ordering": ["-score"],
+            },
+        ),
+        migrations.CreateModel(
+            name="TopPost",
+            fields=[
+                (
+                    "post",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="posts.post",
+                    ),
+                ),
+                ("score", models.PositiveIntegerField()),
+            ],
+            options={
+                "ordering": ["-score"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["likes_count"], name="comment_likes_count_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["likes_count"], name="post_likes_count_idx"),
+        ),
+        migrations.RunPython(populate_leaderboards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0014_post_status_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:36
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_likes(apps, schema_editor):
+    """
+    Keep the oldest like of each user and object, and recount the affected objects.
+
+    The leaderboards were seeded from the inflated counters, so both are then
+    rebuilt from the corrected ones, as `rebuild_leaderboard` does.
+    """
+    for name in ("Post", "Comment", "Reply"):
+        model = apps.get_model("posts", name)
+        liked = apps.get_model("posts", f"Liked{name}")
+        field = name.lower()
+
+        duplicates = (
+            liked.objects.order_by()
+            .values("user", field)
+            .annotate(total=Count("id"), keep=Min("id"))
+            .filter(total__gt=1)
+        )
+        for duplicate in duplicates:
+            liked.objects.filter(
+                user=duplicate["user"], **{field: duplicate[field]}
+            ).exclude(id=duplicate["keep"]).delete()
+            model.objects.filter(id=duplicate[field]).update(
+                likes_count=liked.objects.filter(**{field: duplicate[field]}).count()
+            )
+
+        if name != "Reply":
+            board = apps.get_model("posts", f"Top{name}")
+            top = model.objects.filter(likes_count__gt=0).order_by(
+                "-likes_count", "-created"
+            )
+            entries = [
+                board(**{field: obj}, score=obj.likes_count)
+                for obj in top.only("id", "likes_count")[: settings.LEADERBOARD_SIZE]
+            ]
+            board.objects.all().delete()
+            board.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0016_pendinglike"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_likes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="likedcomment",
+            constraint=models.UniqueConstraint(
+                fields=("user", "comment"), name="unique_likedcomment"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="likedpost",
+            constraint=models.UniqueConstraint(
+                fields=("user", "post"), name="unique_likedpost"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="likedreply",
+            constraint=models.UniqueConstraint(
+                fields=("user", "reply"), name="unique_likedreply"
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0017_likedcomment_unique_likedcomment_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["parent_post", "created"], name="comment_post_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["parent_post", "likes_count"], name="comment_post_likes_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["author", "likes_count"], name="comment_author_likes_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="likedpost",
+            index=models.Index(
+                fields=["user", "created"], name="likedpost_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["created", "id"], name="post_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["author", "created"], name="post_author_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["author", "likes_count"], name="post_author_likes_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reply",
+            index=models.Index(
+                fields=["parent_comment", "created"], name="reply_comment_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:42
+
+import uuid
+
+from django.db import migrations
+
+import posts.fields
+
+# Every column holding a Post, Comment or Reply key.
+KEY_COLUMNS = [
+    ("posts_post", "id"),
+    ("posts_comment", "id"),
+    ("posts_comment", "parent_post_id"),
+    ("posts_reply", "id"),
+    ("posts_reply", "parent_comment_id"),
+    ("posts_likedpost", "post_id"),
+    ("posts_likedcomment", "comment_id"),
+    ("posts_likedreply", "reply_id"),
+    ("posts_post_tags", "post_id"),
+    ("posts_toppost", "post_id"),
+    ("posts_topcomment", "comment_id"),
+]
+
+
+def convert_keys(schema_editor, function, source_type):
+    """Rewrite the copied key values of every column in place with `function`."""
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        # Other backends convert the values in the ALTER COLUMN itself.
+        return
+    connection.ensure_connection()
+    connection.connection.create_function("convert_key", 1, function)
+    with connection.cursor() as cursor:
+        for table, column in KEY_COLUMNS:
+            cursor.execute(
+                f'UPDATE "{table}" SET "{column}" = convert_key("{column}") '
+                f'WHERE typeof("{column}") = %s',
+                [source_type],
+            )
+
+
+def keys_to_bytes(apps, schema_editor):
+    convert_keys(schema_editor, lambda key: uuid.UUID(key).bytes, "text")
+
+
+def keys_to_text(apps, schema_editor):
+    convert_keys(schema_editor, lambda key: str(uuid.UUID(bytes=key)), "blob")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0018_comment_comment_post_created_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="comment",
+            name="id",
+            field=posts.fields.CompactUUIDField(
+                default=uuid.uuid4,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+                unique=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="post",
+            name="id",
+            field=posts.fields.CompactUUIDField(
+                default=uuid.uuid4,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+                unique=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reply",
+            name="id",
+            field=posts.fields.CompactUUIDField(
+                default=uuid.uuid4,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+                unique=True,
+            ),
+        ),
+        migrations.RunPython(keys_to_bytes, keys_to_text),
+    ]
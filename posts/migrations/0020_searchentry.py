@@ -0,0 +1,92 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import posts.fields
+
+SEARCH_TABLE = """
+    CREATE VIRTUAL TABLE posts_search USING fts5(
+        title, body, artist, tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+"""
+
+# Title matches count ten times as much as body matches, artist matches five.
+SEARCH_RANK = (
+    "INSERT INTO posts_search (posts_search, rank)"
+    " VALUES ('rank', 'bm25(10.0, 1.0, 5.0)')"
+)
+
+FILL_INDEX = [
+    "INSERT INTO posts_searchentry (kind, object_id, post_id)"
+    " SELECT 'post', id, id FROM posts_post",
+    "INSERT INTO posts_searchentry (kind, object_id, post_id)"
+    " SELECT 'comment', id, parent_post_id FROM posts_comment",
+    "INSERT INTO posts_search (rowid, title, body, artist)"
+    " SELECT e.id, p.title, p.body, coalesce(p.artist, '') FROM posts_searchentry e"
+    " JOIN posts_post p ON e.kind = 'post' AND p.id = e.object_id",
+    "INSERT INTO posts_search (rowid, title, body, artist)"
+    " SELECT e.id, '', c.body, '' FROM posts_searchentry e"
+    " JOIN posts_comment c ON e.kind = 'comment' AND c.id = e.object_id",
+]
+
+
+def create_search_index(apps, schema_editor):
+    """Create the FTS5 table and index the existing posts and comments."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in [SEARCH_TABLE, SEARCH_RANK, *FILL_INDEX]:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS posts_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0019_alter_comment_id_alter_post_id_alter_reply_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("post", "Post"), ("comment", "Comment")],
+                        max_length=10,
+                    ),
+                ),
+                ("object_id", posts.fields.CompactUUIDField()),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="posts.post",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "object_id"), name="unique_searchentry"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,103 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+import posts.fields
+
+
+def fill_post_tags(apps, schema_editor):
+    """Copy each post's creation time to its tag rows and count the posts per tag."""
+    Post = apps.get_model("posts", "Post")
+    PostTag = apps.get_model("posts", "PostTag")
+    Tag = apps.get_model("posts", "Tag")
+
+    PostTag.objects.update(
+        created=Subquery(Post.objects.filter(id=OuterRef("post_id")).values("created"))
+    )
+    Tag.objects.update(
+        post_count=Coalesce(
+            Subquery(
+                PostTag.objects.filter(tag=OuterRef("pk"))
+                .order_by()
+                .values("tag")
+                .annotate(total=Count("pk"))
+                .values("total"),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0020_searchentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tag",
+            name="post_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # Take over the auto-created posts_post_tags table as an explicit model.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="PostTag",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "post",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="posts.post",
+                            ),
+                        ),
+                        (
+                            "tag",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                to="posts.tag",
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "posts_post_tags",
+                        "unique_together": {("post", "tag")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="post",
+                    name="tags",
+                    field=models.ManyToManyField(
+                        through="posts.PostTag", to="posts.tag"
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="posttag",
+            name="created",
+            field=posts.fields.PostCreatedField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_post_tags, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="posttag",
+            index=models.Index(
+                fields=["tag", "created", "post"], name="posttag_tag_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.15 on 2026-10-17 05:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0021_posttag"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="comment",
+            name="comment_post_created_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="comment",
+            name="comment_post_likes_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="reply",
+            name="reply_comment_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["parent_post", "created", "id"], name="comment_post_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["parent_post", "likes_count", "created", "id"],
+                name="comment_post_likes_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reply",
+            index=models.Index(
+                fields=["parent_comment", "created", "id"],
+                name="reply_comment_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,94 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def fill_user_stats(apps, schema_editor):
+    """Compute the statistics of the existing users from their content."""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    UserStats = apps.get_model("posts", "UserStats")
+    stats = {
+        pk: UserStats(user_id=pk) for pk in User.objects.values_list("id", flat=True)
+    }
+
+    for name in ("Post", "Comment", "Reply"):
+        model = apps.get_model("posts", name)
+        totals = (
+            model.objects.filter(author__isnull=False)
+            .values("author")
+            .annotate(rows=Count("id"), likes=Sum("likes_count"), latest=Max("created"))
+            .order_by()
+        )
+        for row in totals:
+            entry = stats[row["author"]]
+            if name == "Post":
+                entry.posts_count = row["rows"]
+            entry.likes_received += row["likes"]
+            if entry.last_active is None or row["latest"] > entry.last_active:
+                entry.last_active = row["latest"]
+
+        if name != "Reply":
+            liked = model.objects.filter(author__isnull=False, likes_count__gt=0)
+            field = f"top_{name.lower()}s"
+            for author, pk, likes in liked.order_by(
+                "author", "-likes_count"
+            ).values_list("author", "id", "likes_count"):
+                top = getattr(stats[author], field)
+                if len(top) < settings.USER_STATS_TOP_SIZE:
+                    top.append([pk.hex, likes])
+
+    UserStats.objects.bulk_create(stats.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("posts", "0022_comment_thread_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("posts_count", models.PositiveIntegerField(default=0)),
+                ("likes_received", models.PositiveIntegerField(default=0)),
+                ("top_posts", models.JSONField(default=list)),
+                ("top_comments", models.JSONField(default=list)),
+                ("last_active", models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="likedpost",
+            name="likedpost_user_created_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="post",
+            name="post_author_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="likedpost",
+            index=models.Index(
+                fields=["user", "created", "post"], name="likedpost_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["author", "created", "id"], name="post_author_created_idx"
+            ),
+        ),
+        migrations.RunPython(fill_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_created(apps, schema_editor):
+    """Copy the creation time of every post and comment on the leaderboards."""
+    for board, name, field in [
+        ("TopPost", "Post", "post"),
+        ("TopComment", "Comment", "comment"),
+    ]:
+        model = apps.get_model("posts", name)
+        apps.get_model("posts", board).objects.update(
+            created=Subquery(
+                model.objects.filter(id=OuterRef(field)).values("created")[:1]
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0023_userstats"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="topcomment",
+            options={"ordering": ["-score", "-created"]},
+        ),
+        migrations.AlterModelOptions(
+            name="toppost",
+            options={"ordering": ["-score", "-created"]},
+        ),
+        migrations.AddField(
+            model_name="topcomment",
+            name="created",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name="toppost",
+            name="created",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(fill_created, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="topcomment",
+            name="created",
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name="toppost",
+            name="created",
+            field=models.DateTimeField(),
+        ),
+    ]
@@ -2,6 +2,9 @@ import uuid
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
+
+from .fields import CompactUUIDField, PostCreatedField
 
 
 class Post(models.Model):
@@ -18,16 +21,29 @@ class Post(models.Model):
         likes (ManyToManyField): A many-to-many relationship with the `User` model,
             indicating which users have liked the post. The relationship is managed
             through the `LikedPost` intermediate model.
+        likes_count (int): Denormalized number of likes, kept in sync with `likes`.
+        comments_count (int): Denormalized number of comments on the post.
         tags (ManyToManyField): A many-to-many relationship with the `Tag` model,
-            allowing multiple tags to be associated with a post.
+            allowing multiple tags to be associated with a post. The relationship
+            is managed through the `PostTag` intermediate model.
+        status (str): Whether the Flickr metadata (image, title, artist) is resolved:
+            `ready`, still `pending` in the background job queue, or `failed`.
+        version (int): The content version of the post, bumped whenever its rendered
+            card changes; part of the card's fragment cache key.
         created (datetime): The timestamp when the post was created, automatically set at creation.
-        id (str): A unique identifier for the post, generated using UUID4.
+        id (UUID): A unique identifier for the post, generated using UUID4 and
+            stored in 16 bytes.
 
     Methods:
         __str__():
             Returns a string representation of the post, typically the title.
     """
 
+    READY = "ready"
+    PENDING = "pending"
+    FAILED = "failed"
+    STATUS_CHOICES = [(READY, "Ready"), (PENDING, "Pending"), (FAILED, "Failed")]
+
     title = models.CharField(max_length=500)
     artist = models.CharField(max_length=500, null=True)
     url = models.URLField(max_length=500, null=True)
@@ -37,10 +53,13 @@ class Post(models.Model):
     )
     body = models.TextField()
     likes = models.ManyToManyField(User, related_name="likedposts", through="LikedPost")
-    tags = models.ManyToManyField("Tag")
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    tags = models.ManyToManyField("Tag", through="PostTag")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=READY)
+    version = models.PositiveIntegerField(default=1)
     created = models.DateTimeField(auto_now_add=True)
-    id = models.CharField(
-        max_length=100,
+    id = CompactUUIDField(
         default=uuid.uuid4,
         unique=True,
         primary_key=True,
@@ -58,6 +77,16 @@ class Post(models.Model):
 
     class Meta:
         ordering = ["-created"]
+        indexes = [
+            models.Index(fields=["likes_count"], name="post_likes_count_idx"),
+            models.Index(fields=["created", "id"], name="post_created_idx"),
+            models.Index(
+                fields=["author", "created", "id"], name="post_author_created_idx"
+            ),
+            models.Index(
+                fields=["author", "likes_count"], name="post_author_likes_idx"
+            ),
+        ]
 
 
 class LikedPost(models.Model):
@@ -89,6 +118,16 @@ class LikedPost(models.Model):
         """
         return f"{self.user.username} : {self.post.title}"
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"], name="unique_likedpost")
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "created", "post"], name="likedpost_user_created_idx"
+            )
+        ]
+
 
 class Tag(models.Model):
     """
@@ -100,6 +139,8 @@ class Tag(models.Model):
             or referencing tags in a more readable format.
         order (int, optional): A numeric value used to define the display order
             of tags. Tags with lower values are displayed first. Can be null.
+        post_count (int): Denormalized number of posts in the category, kept in
+            sync with the `PostTag` rows.
 
     Methods:
         __str__():
@@ -110,6 +151,7 @@ class Tag(models.Model):
     image = models.FileField(upload_to="icons/", null=True, blank=True)
     slug = models.SlugField(max_length=20, unique=True)
     order = models.IntegerField(null=True)
+    post_count = models.PositiveIntegerField(default=0)
 
     def __str__(self) -> str:
         """
@@ -124,6 +166,49 @@ class Tag(models.Model):
         ordering = ["order"]
 
 
+class PostTag(models.Model):
+    """
+    A post filed under a category.
+
+    Each row carries a copy of its post's creation time, so a category feed is
+    read newest first straight from the `(tag, created, post)` index, without
+    joining every post of the category.
+
+    Attributes:
+        post (ForeignKey): A foreign key relationship to the `Post` model.
+        tag (ForeignKey): A foreign key relationship to the `Tag` model.
+        created (datetime): The creation time of the post, copied from it when
+            the row is inserted.
+
+    Methods:
+        __str__():
+            Returns a string representation of the link.
+    """
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+    created = PostCreatedField()
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the link.
+
+        Returns:
+            str: The slug of the tag and the title of the post.
+        """
+        return f"{self.tag.slug} : {self.post.title}"
+
+    class Meta:
+        db_table = "posts_post_tags"
+        # As on the auto-created table this model took over, so its index is kept.
+        unique_together = [("post", "tag")]
+        indexes = [
+            models.Index(
+                fields=["tag", "created", "post"], name="posttag_tag_created_idx"
+            )
+        ]
+
+
 class Comment(models.Model):
     """
     Represents a comment made on a blog post.
@@ -138,9 +223,12 @@ class Comment(models.Model):
         likes (ManyToManyField): A many-to-many relationship with the `User` model,
             indicating which users have liked the comment. The relationship is managed
             through the `LikedComment` intermediate model.
+        likes_count (int): Denormalized number of likes, kept in sync with `likes`.
+        replies_count (int): Denormalized number of replies to the comment.
         created (datetime): The timestamp when the comment was created,
             automatically set at creation.
-        id (str): A unique identifier for the comment, generated using UUID4.
+        id (UUID): A unique identifier for the comment, generated using UUID4 and
+            stored in 16 bytes.
 
     Methods:
         __str__():
@@ -158,9 +246,10 @@ class Comment(models.Model):
     likes = models.ManyToManyField(
         User, related_name="likedcomments", through="LikedComment"
     )
+    likes_count = models.PositiveIntegerField(default=0)
+    replies_count = models.PositiveIntegerField(default=0)
     created = models.DateTimeField(auto_now_add=True)
-    id = models.CharField(
-        max_length=100,
+    id = CompactUUIDField(
         default=uuid.uuid4,
         unique=True,
         primary_key=True,
@@ -183,6 +272,20 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["-created"]
+        indexes = [
+            models.Index(fields=["likes_count"], name="comment_likes_count_idx"),
+            models.Index(
+                fields=["parent_post", "created", "id"],
+                name="comment_post_created_idx",
+            ),
+            models.Index(
+                fields=["parent_post", "likes_count", "created", "id"],
+                name="comment_post_likes_idx",
+            ),
+            models.Index(
+                fields=["author", "likes_count"], name="comment_author_likes_idx"
+            ),
+        ]
 
 
 class LikedComment(models.Model):
@@ -214,6 +317,13 @@ class LikedComment(models.Model):
         """
         return f"{self.user.username} : {self.comment.body[:30]}"
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "comment"], name="unique_likedcomment"
+            )
+        ]
+
 
 class Reply(models.Model):
     """
@@ -229,8 +339,10 @@ class Reply(models.Model):
         likes (ManyToManyField): A many-to-many relationship with the `User` model,
             indicating which users have liked the reply. The relationship is managed
             through the `LikedReply` intermediate model.
+        likes_count (int): Denormalized number of likes, kept in sync with `likes`.
         created (datetime): The timestamp when the reply was created, automatically set at creation.
-        id (str): A unique identifier for the reply, generated using UUID4.
+        id (UUID): A unique identifier for the reply, generated using UUID4 and
+            stored in 16 bytes.
 
     Methods:
         __str__():
@@ -248,9 +360,9 @@ class Reply(models.Model):
     likes = models.ManyToManyField(
         User, related_name="likedreplies", through="LikedReply"
     )
+    likes_count = models.PositiveIntegerField(default=0)
     created = models.DateTimeField(auto_now_add=True)
-    id = models.CharField(
-        max_length=100,
+    id = CompactUUIDField(
         default=uuid.uuid4,
         unique=True,
         primary_key=True,
@@ -273,6 +385,12 @@ class Reply(models.Model):
 
     class Meta:
         ordering = ["-created"]
+        indexes = [
+            models.Index(
+                fields=["parent_comment", "created", "id"],
+                name="reply_comment_created_idx",
+            )
+        ]
 
 
 class LikedReply(models.Model):
@@ -303,3 +421,244 @@ class LikedReply(models.Model):
             str: The body of the liked reply.
         """
         return f"{self.user.username} : {self.reply.body[:30]}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "reply"], name="unique_likedreply")
+        ]
+
+
+class TopPost(models.Model):
+    """
+    An entry of the materialized top posts leaderboard shown in the sidebar.
+
+    The table holds at most `LEADERBOARD_SIZE` rows. It is updated incrementally
+    whenever a post is liked or unliked, and rebuilt from `Post.likes_count`
+    by the `rebuild_leaderboard` management command.
+
+    Attributes:
+        post (OneToOneField): The post on the leaderboard.
+        score (int): The number of likes of the post when last updated.
+        created (datetime): The creation time of the post; newer posts rank
+            first among equal scores, as in `rebuild_leaderboard`.
+    """
+
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, primary_key=True, related_name="+"
+    )
+    score = models.PositiveIntegerField()
+    created = models.DateTimeField()
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the leaderboard entry.
+
+        Returns:
+            str: The score and the title of the post.
+        """
+        return f"{self.score} : {self.post.title}"
+
+    class Meta:
+        ordering = ["-score", "-created"]
+
+
+class TopComment(models.Model):
+    """
+    An entry of the materialized top comments leaderboard shown in the sidebar.
+
+    The table holds at most `LEADERBOARD_SIZE` rows. It is updated incrementally
+    whenever a comment is liked or unliked, and rebuilt from `Comment.likes_count`
+    by the `rebuild_leaderboard` management command.
+
+    Attributes:
+        comment (OneToOneField): The comment on the leaderboard.
+        score (int): The number of likes of the comment when last updated.
+        created (datetime): The creation time of the comment; newer comments
+            rank first among equal scores, as in `rebuild_leaderboard`.
+    """
+
+    comment = models.OneToOneField(
+        Comment, on_delete=models.CASCADE, primary_key=True, related_name="+"
+    )
+    score = models.PositiveIntegerField()
+    created = models.DateTimeField()
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the leaderboard entry.
+
+        Returns:
+            str: The score and the first 30 characters of the comment body.
+        """
+        return f"{self.score} : {self.comment.body[:30]}"
+
+    class Meta:
+        ordering = ["-score", "-created"]
+
+
+class UserStats(models.Model):
+    """
+    The precomputed numbers and top lists shown on a user's profile page.
+
+    The row is updated incrementally whenever the user posts, comments or
+    replies and whenever one of their posts, comments or replies is liked or
+    unliked, so the profile reads it in one query instead of counting and
+    sorting the user's content. `rebuild_user_stats` recomputes it.
+
+    Attributes:
+        user (OneToOneField): The user the statistics are about.
+        posts_count (int): The number of posts the user has written.
+        likes_received (int): The number of likes on the user's posts,
+            comments and replies.
+        top_posts (list): `[id, likes]` pairs of the user's most liked posts,
+            most liked first, at most `USER_STATS_TOP_SIZE` of them.
+        top_comments (list): The same for the user's comments.
+        last_active (datetime): When the user last posted, commented or
+            replied, or None if they never did.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    likes_received = models.PositiveIntegerField(default=0)
+    top_posts = models.JSONField(default=list)
+    top_comments = models.JSONField(default=list)
+    last_active = models.DateTimeField(null=True)
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the statistics.
+
+        Returns:
+            str: The username, post count and likes received.
+        """
+        return f"{self.user.username} : {self.posts_count} / {self.likes_received}"
+
+
+class Job(models.Model):
+    """
+    A unit of background work stored in the database and run by `manage.py run_jobs`.
+
+    Attributes:
+        kind (str): The name of the registered handler that processes the job.
+        object_id (str): The primary key of the object the job works on.
+        status (str): `pending`, `running`, `done` or `failed`.
+        attempts (int): The number of times the job has been tried.
+        run_after (datetime): The earliest time the job may run. For a running job
+            this is when its lease expires and another worker may pick it up.
+        last_error (str): The error raised by the last failed attempt.
+        created (datetime): The timestamp when the job was enqueued.
+
+    Methods:
+        __str__():
+            Returns a string representation of the job.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    object_id = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the job.
+
+        Returns:
+            str: The kind, object id and status of the job.
+        """
+        return f"{self.kind} : {self.object_id} ({self.status})"
+
+    class Meta:
+        ordering = ["run_after"]
+        indexes = [models.Index(fields=["status", "run_after"], name="job_due_idx")]
+
+
+class PendingLike(models.Model):
+    """
+    A like toggle waiting to be applied by `manage.py flush_likes`.
+
+    With `LIKE_BUFFER` enabled, `like_toggle` only appends one of these rows
+    instead of writing the like and the counters, so bursts of likes on a hot
+    post do not queue up on the database write lock. Toggles cancel out in
+    pairs: a user with an odd number of pending rows for an object has flipped
+    their like.
+
+    Attributes:
+        kind (str): The model name of the liked object: `post`, `comment` or `reply`.
+        object_id (str): The primary key of the liked object.
+        user (ForeignKey): The user who toggled the like.
+        created (datetime): The timestamp when the toggle was made.
+    """
+
+    kind = models.CharField(max_length=20)
+    object_id = models.CharField(max_length=100)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the pending toggle.
+
+        Returns:
+            str: The user, kind and object id of the toggle.
+        """
+        return f"{self.user_id} : {self.kind} {self.object_id}"
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["user", "kind"], name="pendinglike_user_idx")]
+
+
+class SearchEntry(models.Model):
+    """
+    A post or comment indexed for full-text search.
+
+    The text itself lives in the `posts_search` FTS5 table, whose rowid is the
+    entry's `id`; this row maps a search hit back to the indexed object. Both
+    are maintained by `posts.core.search`.
+
+    Attributes:
+        kind (str): `post` or `comment`.
+        object_id (UUID): The primary key of the indexed post or comment.
+        post (ForeignKey): The post a hit links to: the post itself, or the
+            post the comment was made on.
+    """
+
+    POST = "post"
+    COMMENT = "comment"
+    KIND_CHOICES = [(POST, "Post"), (COMMENT, "Comment")]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = CompactUUIDField()
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="+")
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the search entry.
+
+        Returns:
+            str: The kind and object id of the entry.
+        """
+        return f"{self.kind} {self.object_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="unique_searchentry"
+            )
+        ]
@@ -0,0 +1,166 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .core.search import index_comments, index_posts, unindex
+from .core.stats import record_created, record_deleted
+from .core.tags import bump_tags_version
+from .models import Comment, Post, PostTag, Reply, SearchEntry, Tag, UserStats
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """
+    Signal receiver to keep a saved Post's search entry up to date.
+
+    Args:
+        sender (type): The model class (Post) that sent the signal.
+        instance (Post): The Post instance being saved.
+        **kwargs: Additional keyword arguments provided by the signal.
+    """
+    index_posts([instance])
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    """
+    Signal receiver to keep a saved Comment's search entry up to date.
+
+    Args:
+        sender (type): The model class (Comment) that sent the signal.
+        instance (Comment): The Comment instance being saved.
+        **kwargs: Additional keyword arguments provided by the signal.
+    """
+    index_comments([instance])
+
+
+@receiver(pre_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    """
+    Signal receiver to drop a deleted Post and its comments from the search index.
+
+    Args:
+        sender (type): The model class (Post) that sent the signal.
+        instance (Post): The Post instance being deleted.
+        **kwargs: Additional keyword arguments provided by the signal.
+    """
+    unindex(SearchEntry.objects.filter(post=instance))
+
+
+@receiver(pre_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    """
+    Signal receiver to drop a deleted Comment from the search index.
+
+    Args:
+        sender (type): The model class (Comment) that sent the signal.
+        instance (Comment): The Comment instance being deleted.
+        **kwargs: Additional keyword arguments provided by the signal.
+    """
+    unindex(SearchEntry.objects.filter(kind=SearchEntry.COMMENT, object_id=instance.id))
+
+
+@receiver(m2m_changed, sender=PostTag)
+def count_category_posts(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal receiver to keep `Tag.post_count` in step with a post's categories.
+
+    Links are counted after they are added and before they are removed, from
+    either side of the relation, and only if they exist: `pk_set` of a removal
+    may name categories the post was never in.
+
+    Args:
+        sender (type): The through model (PostTag) that sent the signal.
+        instance (Post | Tag): The object whose relation changed.
+        action (str): The kind of change, e.g. `post_add` or `pre_remove`.
+        reverse (bool): Whether `instance` is a Tag.
+        pk_set (set): The ids of the added or removed objects, None on clear.
+        **kwargs: Additional keyword arguments provided by the signal.
+    """
+    if action not in ("post_add", "pre_remove", "pre_clear"):
+        return
+
+    links = PostTag.objects.filter(**{"tag" if reverse else "post": instance})
+    if pk_set is not None:
+        links = links.filter(**{"post__in" if reverse else "tag__in": pk_set})
+    delta = 1 if action == "post_add" else -1
+
+    for tag_id, count in Counter(links.values_list("tag_id", flat=True)).items():
+        Tag.objects.filter(id=tag_id).update(post_count=F("post_count") + delta * count)
+
+
+@receiver(pre_delete, sender=Post)
+def uncount_category_posts(sender, instance, **kwargs):
+    """
+    Signal receiver to remove a deleted Post from its categories' post counts.
+
+    Args:
+        sender (type): The model class (Post) that sent the signal.
+        instance (Post): The Post instance being deleted.
+        **kwargs: Additional keyword arguments provided by the signal.
+    """
+    Tag.objects.filter(posttag__post=instance).update(post_count=F("post_count") - 1)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def reload_tags(sender, instance, **kwargs):
+    """
+    Signal receiver to refresh every worker's copy of the categories.
+
+    Args:
+        sender (type): The model class (Tag) that sent the signal.
+        instance (Tag): The Tag instance being saved or deleted.
+        **kwargs: Additional keyword arguments provided by the signal.
+    """
+    bump_tags_version()
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, **kwargs):
+    """
+    Signal receiver to start the statistics of a new User.
+
+    Args:
+        sender (type): The model class (User) that sent the signal.
+        instance (User): The User instance being saved.
+        created (bool): A boolean indicating whether this is a new User instance.
+        **kwargs: Additional keyword arguments provided by the signal.
+    """
+    if created:
+        UserStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Reply)
+def count_authored(sender, instance, created, **kwargs):
+    """
+    Signal receiver to count a new Post, Comment or Reply in its author's statistics.
+
+    Args:
+        sender (type): The model class that sent the signal.
+        instance (Post | Comment | Reply): The instance being saved.
+        created (bool): A boolean indicating whether this is a new instance.
+        **kwargs: Additional keyword arguments provided by the signal.
+    """
+    if created:
+        record_created(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Reply)
+def uncount_authored(sender, instance, **kwargs):
+    """
+    Signal receiver to remove a deleted Post, Comment or Reply from its author's statistics.
+
+    Args:
+        sender (type): The model class that sent the signal.
+        instance (Post | Comment | Reply): The instance being deleted.
+        **kwargs: Additional keyword arguments provided by the signal.
+    """
+    record_deleted(instance)
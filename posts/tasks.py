@@ -0,0 +1,64 @@
+import requests
+from django.conf import settings
+from django.db.models import F
+
+from posts.core.flickr import fetch_flickr_metadata
+from posts.core.images import evict
+from posts.core.jobs import PermanentJobError, job_handler
+from posts.core.search import index_posts
+
+from .models import Post
+
+
+def mark_post_failed(post_id: str) -> None:
+    """
+    Flag a post whose metadata could not be resolved.
+
+    Args:
+        post_id (str): The primary key of the post.
+    """
+    Post.objects.filter(id=post_id).update(status=Post.FAILED, version=F("version") + 1)
+
+
+@job_handler("post-metadata", on_failure=mark_post_failed)
+def resolve_post_metadata(post_id: str) -> None:
+    """
+    Fill in the image, title and artist of a pending post from its Flickr page.
+
+    Args:
+        post_id (str): The primary key of the post. Deleted posts are skipped.
+
+    Raises:
+        PermanentJobError: If the photo is missing, private or has no metadata,
+            so the post is flagged as failed without further attempts.
+        requests.RequestException: If Flickr could not be reached; the job is
+            retried.
+    """
+    post = Post.objects.filter(id=post_id).only("url").first()
+    if post is None:
+        return
+
+    try:
+        metadata = fetch_flickr_metadata(post.url)
+    except requests.HTTPError as error:
+        status = error.response.status_code if error.response is not None else 500
+        if status < 500 and status != 429:
+            raise PermanentJobError(f"{post.url}: {error}") from error
+        raise
+    except ValueError as error:
+        raise PermanentJobError(str(error)) from error
+    Post.objects.filter(id=post_id).update(
+        **metadata, status=Post.READY, version=F("version") + 1
+    )
+    index_posts(Post.objects.filter(id=post_id))
+
+
+@job_handler("image-cache")
+def evict_image_cache(_: str) -> None:
+    """
+    Trim the disk cache of the post image proxy to `IMAGE_CACHE_MAX_BYTES`.
+
+    Args:
+        _ (str): Unused; the job works on the whole cache.
+    """
+    evict(settings.IMAGE_CACHE_MAX_BYTES)
@@ -0,0 +1,14 @@
+from django.template import Library
+from django.urls import reverse
+
+register = Library()
+
+
+@register.simple_tag
+def post_image(post, width):
+    return reverse("post-image", args=[post.id, width])
+
+
+@register.simple_tag
+def post_image_srcset(post, *widths):
+    return ", ".join(f"{post_image(post, width)} {width}w" for width in widths)
@@ -0,0 +1,15 @@
+from django.template import Library
+
+from ..core.likes import liked_ids
+
+register = Library()
+
+
+@register.filter
+def liked_by(obj, user):
+    return obj.id in liked_ids(user, type(obj))
+
+
+@register.filter
+def like_count(obj, user):
+    return obj.likes_count + liked_ids(user, type(obj)).delta(obj.id)
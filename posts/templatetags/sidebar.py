@@ -1,29 +1,22 @@
-from django.db.models import Count
 from django.template import Library
 
-from ..models import Comment, Post, Tag
+from ..core.tags import post_counts, tag_registry
+from ..models import TopComment, TopPost
 
 register = Library()
 
 
 @register.inclusion_tag("includes/sidebar.html")
 def sidebar_view(tag=None, user=None):
-    categories = Tag.objects.all()
-    top_posts = (
-        Post.objects.annotate(num_likes=Count("likes"))
-        .filter(num_likes__gt=0)
-        .order_by("-num_likes")
-    )
-    top_comments = (
-        Comment.objects.annotate(num_likes=Count("likes"))
-        .filter(num_likes__gt=0)
-        .order_by("-num_likes")
-    )
+    counts = post_counts()
+    categories = [(tag, counts.get(tag.id, 0)) for tag in tag_registry.all()]
+    top_posts = TopPost.objects.select_related("post__author__profile")
+    top_comments = TopComment.objects.select_related("comment__author__profile")
     context = {
         "categories": categories,
         "tag": tag,
-        "top_posts": top_posts,
+        "top_posts": [entry.post for entry in top_posts],
         "user": user,
-        "top_comments": top_comments,
+        "top_comments": [entry.comment for entry in top_comments],
     }
     return context
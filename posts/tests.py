@@ -1,3 +1,1044 @@
-from django.test import TestCase
+import os
+import re
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from core.routers import STICKY_COOKIE
+
+from .core import flickr
+from .core.flickr import get_flickr_client
+from .core.images import evict
+from .core.jobs import (
+    HANDLERS,
+    PermanentJobError,
+    claim_job,
+    enqueue,
+    job_handler,
+    run_job,
+)
+from .core.leaderboard import rebuild_leaderboard, update_leaderboard
+from .core.likes import toggle_like
+from .core.search import search
+from .core.stats import rebuild_user_stats
+from .core.tags import COUNTS_KEY, VERSION_KEY, post_counts, tag_registry
+from .models import (
+    Comment,
+    Job,
+    LikedComment,
+    LikedPost,
+    PendingLike,
+    Post,
+    PostTag,
+    Reply,
+    SearchEntry,
+    Tag,
+    TopPost,
+    UserStats,
+)
+
+PHOTO_PAGE = """<html><head>
+<meta property="og:image" content="https://live.staticflickr.com/65535/{id}_b.jpg">
+</head><body>
+<h1 class="photo-title"> Photo {id} </h1>
+<a class="owner-name" href="/photos/owner/">Owner {id}</a>
+</body></html>"""
+
+
+class StubFlickrHandler(BaseHTTPRequestHandler):
+    """Serve a Flickr-like photo page for /photos/<owner>/<id>/, 404 otherwise."""
+
+    def do_GET(self):
+        segments = [segment for segment in self.path.split("/") if segment]
+        if len(segments) != 3 or segments[0] != "photos" or not segments[2].isdigit():
+            self.send_error(404)
+            return
+        body = PHOTO_PAGE.format(id=segments[2]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubImageHandler(BaseHTTPRequestHandler):
+    """Serve a 2000x1000 PNG at /photo.png and fail with a 500 otherwise."""
+
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        if self.path != "/photo.png":
+            self.send_error(500)
+            return
+        body = BytesIO()
+        Image.new("RGB", (2000, 1000), "blue").save(body, "PNG")
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body.getvalue())))
+        self.end_headers()
+        self.wfile.write(body.getvalue())
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FlickrMetadataTests(SimpleTestCase):
+    NESTED_PAGE = """<html><head>
+<meta property="og:site_name" content="Flickr">
+<meta property="og:image" content="https://live.staticflickr.com/65535/9_b.jpg">
+</head><body>
+<h1 class="photo-title"><a href="/photos/owner/9/">Moon &amp; <b>sea</b></a>
+ at dusk</h1>
+<a class="owner-name" href="/photos/owner/">Owner &eacute;</a>
+<h1 class="photo-title">Later title</h1>
+</body></html>"""
+
+    def extract(self, html: str, chunk_size: int) -> dict:
+        chunks = (html[i : i + chunk_size] for i in range(0, len(html), chunk_size))
+        return flickr.extract_flickr_metadata(chunks, "https://flickr.test/")
+
+    def test_matches_beautifulsoup_at_any_chunk_size(self):
+        for html in (PHOTO_PAGE.format(id=7), self.NESTED_PAGE):
+            expected = flickr.parse_flickr_metadata(html, "https://flickr.test/")
+            for chunk_size in (1, 7, len(html)):
+                with self.subTest(html=html[-40:], chunk_size=chunk_size):
+                    self.assertEqual(self.extract(html, chunk_size), expected)
+
+    def test_nested_title_markup_is_kept_as_text(self):
+        self.assertEqual(
+            self.extract(self.NESTED_PAGE, 16),
+            {
+                "image": "https://live.staticflickr.com/65535/9_b.jpg",
+                "title": "Moon & sea\n at dusk",
+                "artist": "Owner \xe9",
+            },
+        )
+
+    def test_stops_reading_once_all_fields_are_found(self):
+        head, tail = PHOTO_PAGE.format(id=7).split("</a>")
+
+        def chunks():
+            yield head
+            yield "</a>"
+            raise AssertionError("Read past the metadata")
+
+        metadata = flickr.extract_flickr_metadata(chunks(), "https://flickr.test/")
+        self.assertEqual(metadata["artist"], "Owner 7")
+
+    def test_page_without_metadata_is_rejected(self):
+        html = PHOTO_PAGE.format(id=7).replace("owner-name", "owner")
+        with self.assertRaisesMessage(ValueError, "https://flickr.test/"):
+            self.extract(html, 7)
+        with self.assertRaisesMessage(ValueError, "https://flickr.test/"):
+            flickr.parse_flickr_metadata(html, "https://flickr.test/")
+
+
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubFlickrHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user("importer", "importer@example.com")
+        self.animals = Tag.objects.create(name="Animals", slug="animals", order=1)
+        self.urban = Tag.objects.create(name="Urban", slug="urban", order=2)
+
+    def run_import(self, rows: list[str], **options) -> tuple[str, str]:
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write("\n".join(rows))
+        self.addCleanup(os.remove, file.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "import_posts",
+            file.name,
+            author="importer",
+            stdout=stdout,
+            stderr=stderr,
+            **options,
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_resolves_metadata_and_tags(self):
+        rows = [
+            f"{self.base_url}/photos/owner/{i}/in/explore/,Caption {i},animals urban"
+            for i in range(25)
+        ]
+        stdout, stderr = self.run_import(rows, workers=4, batch_size=10)
+
+        self.assertIn("Imported 25 posts", stdout)
+        self.assertEqual(stderr, "")
+        post = Post.objects.get(body="Caption 7")
+        self.assertEqual(post.url, f"{self.base_url}/photos/owner/7/")
+        self.assertEqual(post.title, "Photo 7")
+        self.assertEqual(post.artist, "Owner 7")
+        self.assertEqual(post.image, "https://live.staticflickr.com/65535/7_b.jpg")
+        self.assertEqual(post.author, self.user)
+        self.assertEqual(post.status, Post.READY)
+        self.assertQuerySetEqual(post.tags.all(), [self.animals, self.urban])
+
+    def test_import_reports_failures(self):
+        rows = [
+            f"{self.base_url}/photos/owner/1/,Good,animals",
+            f"{self.base_url}/photos/owner/missing/,Bad,",
+        ]
+        stdout, stderr = self.run_import(rows)
+
+        self.assertIn("Imported 1 posts", stdout)
+        self.assertIn("1 failed", stdout)
+        self.assertIn("/photos/owner/missing/", stderr)
+        self.assertFalse(Post.objects.filter(body="Bad").exists())
+
+    def test_import_reuses_known_photos(self):
+        url = f"{self.base_url}/photos/owner/0/"
+        Post.objects.create(
+            url=url, title="Known", artist="Someone", image="x", body=""
+        )
+        self.server.shutdown()
+        try:
+            stdout, _ = self.run_import([f"{url},Again,"])
+        finally:
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.assertIn("Imported 1 posts", stdout)
+        self.assertEqual(Post.objects.get(body="Again").title, "Known")
+
+
+class ImageProxyTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubImageHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.enterContext(override_settings(IMAGE_CACHE_DIR=cache_dir.name))
+        self.cache_dir = Path(cache_dir.name)
+        # Fresh clients, so that a circuit opened by one test does not leak.
+        flickr.image_client = flickr.flickr_client = None
+        StubImageHandler.requests = 0
+        author = User.objects.create_user("author", "author@example.com")
+        self.post = Post.objects.create(
+            title="Sea", image=f"{self.base_url}/photo.png", author=author
+        )
+
+    def get(self, width: int, post: Post = None):
+        return self.client.get(f"/image/{(post or self.post).id}/{width}/")
+
+    def test_unsupported_width_is_not_found(self):
+        self.assertEqual(self.get(100).status_code, 404)
+        self.assertEqual(StubImageHandler.requests, 0)
+
+    def test_variant_is_generated_once_then_served_from_disk(self):
+        for _ in range(2):
+            response = self.get(320)
+            self.assertEqual(response["Content-Type"], "image/jpeg")
+            self.assertIn("immutable", response["Cache-Control"])
+            with Image.open(BytesIO(b"".join(response.streaming_content))) as image:
+                self.assertEqual(image.size, (320, 160))
+        self.assertEqual(StubImageHandler.requests, 1)
+
+        self.get(80)
+        self.assertEqual(StubImageHandler.requests, 1)
+
+    @override_settings(IMAGE_MAX_BYTES=1024)
+    def test_oversized_original_redirects(self):
+        response = self.get(320)
+        self.assertRedirects(response, self.post.image, fetch_redirect_response=False)
+        self.assertFalse(list(self.cache_dir.glob("*/*")))
+
+    def test_failed_fetch_redirects_without_tripping_metadata_client(self):
+        broken = Post.objects.create(
+            title="Broken", image=f"{self.base_url}/broken.png", author=self.post.author
+        )
+        for _ in range(settings.FLICKR_FAILURE_THRESHOLD + 1):
+            response = self.get(320, post=broken)
+            self.assertRedirects(response, broken.image, fetch_redirect_response=False)
+        self.assertEqual(StubImageHandler.requests, settings.FLICKR_FAILURE_THRESHOLD)
+        with get_flickr_client().get(self.post.image):
+            pass
+
+    def test_cache_is_swept_in_the_background(self):
+        self.get(1024)
+        size = sum(path.stat().st_size for path in self.cache_dir.glob("*/*"))
+        with override_settings(IMAGE_CACHE_MAX_BYTES=size):
+            self.get(640)
+            self.assertTrue(Job.objects.filter(kind="image-cache").exists())
+            evict(settings.IMAGE_CACHE_MAX_BYTES)
+        remaining = sum(path.stat().st_size for path in self.cache_dir.glob("*/*"))
+        self.assertLessEqual(remaining, size * 0.9)
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        job_handler("test-flaky", on_failure=self.calls.append)(self.fail_with)
+        self.addCleanup(HANDLERS.pop, "test-flaky")
+
+    def fail_with(self, object_id: str):
+        raise {"permanent": PermanentJobError, "transient": OSError}[object_id]()
+
+    def test_permanent_error_fails_at_once(self):
+        job = enqueue("test-flaky", "permanent")
+        run_job(claim_job())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 1))
+        self.assertEqual(self.calls, ["permanent"])
+
+    def test_expired_lease_drops_stale_outcome(self):
+        job = enqueue("test-flaky", "transient")
+        stale = claim_job()
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        current = claim_job()
+
+        run_job(stale)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.RUNNING, 2))
+        self.assertEqual(job.run_after, current.run_after)
+
+        run_job(current)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("author", "author@example.com")
+        self.fans = [
+            User.objects.create_user(f"fan{i}", f"fan{i}@example.com") for i in range(3)
+        ]
+        self.tag = Tag.objects.create(name="Night", slug="night", image="n.png")
+        self.posts = [
+            Post.objects.create(title=str(i), image="x", author=self.author)
+            for i in range(2)
+        ]
+        for post in self.posts:
+            post.tags.add(self.tag)
+
+    def assert_counters_match_rows(self):
+        for post in Post.objects.all():
+            self.assertEqual(post.likes_count, post.likes.count())
+            self.assertEqual(post.comments_count, post.comments.count())
+        for comment in Comment.objects.all():
+            self.assertEqual(comment.likes_count, comment.likes.count())
+            self.assertEqual(comment.replies_count, comment.replies.count())
+        for reply in Reply.objects.all():
+            self.assertEqual(reply.likes_count, reply.likes.count())
+        for tag in Tag.objects.all():
+            self.assertEqual(tag.post_count, tag.post_set.count())
+
+    def test_views_keep_counters_equal_to_rows(self):
+        post = self.posts[0]
+        for fan in self.fans:
+            self.client.force_login(fan)
+            self.client.post(f"/commentsent/{post.id}/", {"body": fan.username})
+            comment = Comment.objects.get(author=fan)
+            self.client.post(f"/reply-sent/{comment.id}/", {"body": "Re"})
+            self.client.post(f"/post/like/{post.id}/")
+        for fan in self.fans:
+            self.client.force_login(fan)
+            for comment in Comment.objects.all():
+                self.client.post(f"/comment/like/{comment.id}/")
+            for reply in Reply.objects.all():
+                self.client.post(f"/reply/like/{reply.id}/")
+        self.assertEqual(LikedComment.objects.count(), 6)
+        self.assert_counters_match_rows()
+
+        self.client.force_login(self.fans[0])
+        self.client.post(f"/post/like/{post.id}/")
+        self.client.post(f"/reply/delete/{Reply.objects.get(author=self.fans[0]).id}/")
+        self.client.force_login(self.fans[1])
+        self.client.post(
+            f"/comment/delete/{Comment.objects.get(author=self.fans[1]).id}/"
+        )
+        self.client.force_login(self.fans[2])
+        self.client.post("/profile/delete/")
+        self.client.force_login(self.author)
+        self.client.post(f"/post/delete/{self.posts[1].id}/")
+
+        post.refresh_from_db()
+        self.assertEqual((post.likes_count, post.comments_count), (1, 2))
+        self.assert_counters_match_rows()
+
+    def test_repair_recounts_drifted_counters(self):
+        post = self.posts[0]
+        comment = Comment.objects.create(parent_post=post, author=self.fans[0], body="")
+        reply = Reply.objects.create(
+            parent_comment=comment, author=self.fans[1], body=""
+        )
+        for fan in self.fans:
+            toggle_like(fan, comment)
+            toggle_like(fan, reply)
+        Post.objects.filter(id=post.id).update(likes_count=5, comments_count=0)
+        Comment.objects.update(likes_count=1, replies_count=4)
+        Reply.objects.update(likes_count=7)
+        Tag.objects.update(post_count=0)
+
+        out = StringIO()
+        call_command("repair_counters", stdout=out)
+
+        self.assertIn("Post: 1 rows repaired", out.getvalue())
+        self.assertIn("Reply: 1 rows repaired", out.getvalue())
+        self.assert_counters_match_rows()
+
+
+@override_settings(LEADERBOARD_SIZE=2)
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("author", "author@example.com")
+        self.fans = [
+            User.objects.create_user(f"fan{i}", f"fan{i}@example.com") for i in range(2)
+        ]
+        self.posts = [
+            Post.objects.create(title=str(i), image="x", author=self.author)
+            for i in range(3)
+        ]
+
+    def like(self, post: Post, fan: User):
+        toggle_like(fan, post)
+        post.refresh_from_db()
+        update_leaderboard(post)
+
+    def board(self) -> list[Post]:
+        return [entry.post for entry in TopPost.objects.select_related("post")]
+
+    def test_ties_rank_newest_first_like_a_rebuild(self):
+        for post in self.posts:
+            self.like(post, self.fans[0])
+
+        incremental = self.board()
+        self.assertEqual(incremental, self.posts[:0:-1])
+        rebuild_leaderboard(Post)
+        self.assertEqual(self.board(), incremental)
+
+    def test_overfull_board_is_trimmed_by_next_entry(self):
+        # As left behind by concurrent likes inserting past the last place.
+        TopPost.objects.bulk_create(
+            TopPost(post=post, score=1, created=post.created) for post in self.posts
+        )
+        popular = Post.objects.create(title="Popular", image="x", author=self.author)
+        for fan in self.fans:
+            self.like(popular, fan)
+
+        self.assertEqual(self.board(), [popular, self.posts[2]])
+
+    def test_unlike_lets_best_outsider_take_the_place(self):
+        for post, fans in zip(self.posts, (self.fans, self.fans, self.fans[:1])):
+            for fan in fans:
+                self.like(post, fan)
+        self.assertEqual(self.board(), [self.posts[1], self.posts[0]])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.like(self.posts[1], self.fans[1])
+
+        self.assertEqual(self.board(), [self.posts[0], self.posts[2]])
+        deletes = [q["sql"] for q in queries if q["sql"].startswith("DELETE")]
+        self.assertNotIn('DELETE FROM "posts_toppost"', deletes)
+        rebuild_leaderboard(Post)
+        self.assertEqual(self.board(), [self.posts[0], self.posts[2]])
+
+    def test_deleted_entry_is_replaced_by_best_outsider(self):
+        for post in self.posts:
+            self.like(post, self.fans[0])
+        self.client.force_login(self.author)
+
+        self.client.post(f"/post/delete/{self.posts[2].id}/")
+
+        self.assertEqual(self.board(), [self.posts[1], self.posts[0]])
+
+
+class LikeToggleTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("author", "author@example.com")
+        self.post = Post.objects.create(
+            title="Hot", image="x", body="", author=self.author
+        )
+        self.fans = [
+            User.objects.create_user(f"fan{i}", f"fan{i}@example.com") for i in range(6)
+        ]
+
+    def toggle_in_parallel(self, users: list[User]) -> list[Exception]:
+        barrier = threading.Barrier(len(users))
+        errors = []
+
+        def toggle(user):
+            try:
+                barrier.wait()
+                toggle_like(user, Post.objects.get(id=self.post.id))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=toggle, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_toggle_likes_and_unlikes(self):
+        fan = self.fans[0]
+        self.assertEqual(toggle_like(fan, self.post), (True, 1))
+        self.assertEqual(toggle_like(fan, self.post), (False, 0))
+        self.assertFalse(LikedPost.objects.exists())
+
+    def test_parallel_toggles_keep_rows_and_count_in_step(self):
+        # Every fan double-clicks: two toggles of the same like race each other.
+        errors = self.toggle_in_parallel(self.fans * 2)
+
+        self.assertEqual(errors, [])
+        likes = LikedPost.objects.filter(post=self.post)
+        self.assertEqual(likes.count(), likes.values("user").distinct().count())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, likes.count())
+
+
+class LikedStateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user("author", "author@example.com")
+        self.fan = User.objects.create_user("fan", "fan@example.com")
+        self.posts = [
+            Post.objects.create(title=str(i), image="x", author=self.author)
+            for i in range(2)
+        ]
+        self.client.force_login(self.fan)
+
+    def feed(self):
+        with self.assertNumQueries(5):
+            return self.client.get("/", HTTP_HX_REQUEST="true")
+
+    def test_feed_renders_fresh_like_state_with_fixed_queries(self):
+        toggle_like(self.fan, self.posts[0])
+        response = self.feed()
+        self.assertContains(response, "<b>Liked</b>", count=1)
+        self.assertContains(response, "fireheart_red.svg", count=1)
+
+        # Toggled elsewhere, e.g. by a request another worker served.
+        toggle_like(self.fan, self.posts[1])
+        toggle_like(self.fan, self.posts[0])
+        response = self.feed()
+        self.assertContains(response, "<b>Liked</b>", count=1)
+
+
+@override_settings(LIKE_BUFFER=True)
+class BufferedLikeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user("author", "author@example.com")
+        self.fan = User.objects.create_user("fan", "fan@example.com")
+        self.post = Post.objects.create(title="Hot", image="x", author=author)
+        self.client.force_login(self.fan)
+
+    def likes(self, response) -> tuple[bool, int]:
+        html = response.content.decode()
+        shown = re.search(r"fireheart(_red)?\.svg\">\s*(\d+)", html)
+        return "<b>Liked</b>" in html, int(shown[2]) if shown else 0
+
+    def page(self):
+        return self.likes(self.client.get(f"/post/{self.post.id}/"))
+
+    def flush(self):
+        call_command("flush_likes", "--once", stdout=StringIO())
+        self.post.refresh_from_db()
+
+    def test_own_like_shows_before_and_after_flush(self):
+        response = self.client.get(f"/post/like/{self.post.id}/")
+        self.assertEqual(self.likes(response), (True, 1))
+        self.assertEqual(self.page(), (True, 1))
+        self.assertEqual(LikedPost.objects.count(), 0)
+
+        self.flush()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.page(), (True, 1))
+
+        self.client.get(f"/post/like/{self.post.id}/")
+        self.assertEqual(self.page(), (False, 0))
+        self.flush()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(self.page(), (False, 0))
+
+    def test_flush_cancels_double_toggles(self):
+        for _ in range(2):
+            self.client.get(f"/post/like/{self.post.id}/")
+        self.assertEqual(self.page(), (False, 0))
+
+        self.flush()
+        self.assertFalse(PendingLike.objects.exists())
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(self.page(), (False, 0))
+
+
+class FeedQueryCountTests(TestCase):
+    def setUp(self):
+        self.fan = User.objects.create_user("fan", "fan@example.com")
+        authors = [
+            User.objects.create_user(f"author{i}", f"author{i}@example.com")
+            for i in range(3)
+        ]
+        for i in range(8):
+            post = Post.objects.create(
+                title=str(i), image="x", author=authors[i % 3], body="Caption"
+            )
+            post.tags.add(Tag.objects.get_or_create(name="Sea", slug="sea")[0])
+            comment = Comment.objects.create(
+                parent_post=post, author=authors[(i + 1) % 3], body="Nice"
+            )
+            Reply.objects.create(parent_comment=comment, author=self.fan, body="Yes")
+            toggle_like(self.fan, post)
+            toggle_like(self.fan, comment)
+        self.client.force_login(self.fan)
+
+    def assert_queries(self, count: int, url: str, **settings):
+        cache.clear()
+        with override_settings(**settings), self.assertNumQueries(count):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_home_feed_queries_do_not_grow_with_page_size(self):
+        for size in (1, 3, 8):
+            with self.subTest(size=size):
+                self.assert_queries(9, "/", FEED_PAGE_SIZE=size)
+
+    def test_profile_queries_do_not_grow_with_page_size(self):
+        for size in (1, 3, 8):
+            with self.subTest(size=size):
+                self.assert_queries(
+                    6, "/author0/", FEED_PAGE_SIZE=size, PROFILE_PAGE_SIZE=size
+                )
+
+    def test_post_page_queries_do_not_grow_with_comments(self):
+        post = Post.objects.first()
+        self.assert_queries(11, f"/post/{post.id}/")
+        for i in range(5):
+            comment = Comment.objects.create(parent_post=post, author=self.fan, body=i)
+            toggle_like(post.author, comment)
+        self.assert_queries(11, f"/post/{post.id}/")
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    # Includes the replica registered in setUpClass.
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        # A second SQLite file stands in for the replica.
+        fd, cls.replica_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        connections.settings["replica"] = {
+            **connections.settings["default"],
+            "NAME": cls.replica_path,
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        os.remove(cls.replica_path)
+
+    def setUp(self):
+        self.user = User.objects.create_user("reader", "reader@example.com")
+        author = User.objects.create_user("writer", "writer@example.com")
+        self.old = Post.objects.create(
+            title="Replicated", image="x", body="", author=author
+        )
+
+        # The replica lags behind: it is a snapshot of the primary taken
+        # before the next post was written.
+        for alias in ("default", "replica"):
+            connections[alias].ensure_connection()
+        connection.connection.backup(connections["replica"].connection)
+        self.enterContext(override_settings(DATABASE_REPLICAS=["replica"]))
+
+        self.fresh = Post.objects.create(
+            title="Unreplicated", image="x", body="", author=author
+        )
+        self.client.force_login(self.user)
+
+    def test_replica_views_read_from_replica(self):
+        response = self.client.get("/")
+        self.assertContains(response, "Replicated")
+        self.assertNotContains(response, "Unreplicated")
+        self.assertEqual(self.client.get(f"/post/{self.fresh.id}/").status_code, 404)
+
+    def test_writes_stay_on_primary_and_pin_reads(self):
+        self.client.get(f"/post/like/{self.old.id}/")
+
+        self.assertTrue(LikedPost.objects.filter(post=self.old).exists())
+        self.assertFalse(
+            LikedPost.objects.using("replica").filter(post=self.old).exists()
+        )
+        self.assertIn(STICKY_COOKIE, self.client.cookies)
+        self.assertContains(self.client.get("/"), "Unreplicated")
+
+        self.client.cookies[STICKY_COOKIE] = "0"
+        self.assertNotContains(self.client.get("/"), "Unreplicated")
+
+
+@override_settings(SEARCH_PAGE_SIZE=2)
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("author", "author@example.com")
+
+    def post(self, title: str, body: str = "", artist: str = "") -> Post:
+        return Post.objects.create(
+            title=title, body=body, artist=artist, image="x", author=self.author
+        )
+
+    def test_ranks_title_matches_first_and_tracks_changes(self):
+        caption = self.post("Harbour", body="A lighthouse at dusk")
+        title = self.post("Lighthouse")
+        comment = Comment.objects.create(
+            parent_post=caption, author=self.author, body="Lovely lighthouse"
+        )
+
+        first, has_next = search("lighth")
+        self.assertEqual(first[0], ("post", title))
+        self.assertTrue(has_next)
+        second, has_next = search("lighth", page=2)
+        self.assertCountEqual(
+            first[1:] + second, [("post", caption), ("comment", comment)]
+        )
+        self.assertFalse(has_next)
+
+        title.title = "Pier"
+        title.save()
+        comment.delete()
+        self.assertEqual(search("lighthouse"), ([("post", caption)], False))
+
+        caption.delete()
+        self.assertEqual(search("lighthouse"), ([], False))
+        self.assertQuerySetEqual(
+            SearchEntry.objects.values_list("object_id", flat=True), [title.id]
+        )
+
+    def test_view_paginates_htmx_results(self):
+        for i in range(3):
+            self.post(f"Sunset {i}")
+
+        response = self.client.get("/search/?q=sunset", HTTP_HX_REQUEST="true")
+        self.assertContains(response, "Sunset", count=2)
+        self.assertContains(response, "page=2")
+
+        response = self.client.get("/search/?q=sunset&page=2", HTTP_HX_REQUEST="true")
+        self.assertContains(response, "Sunset", count=1)
+        self.assertNotContains(response, "page=3")
+
+        self.assertEqual(self.client.get("/search/?q=x&page=0").status_code, 400)
+        self.assertContains(self.client.get('/search/?q="OR NEAR(*'), "No results")
+
+    def test_other_backends_skip_the_index(self):
+        with mock.patch("posts.core.search.search_available", return_value=False):
+            with CaptureQueriesContext(connection) as queries:
+                post = self.post("Lighthouse")
+                post.delete()
+            self.assertEqual(search("lighthouse"), ([], False))
+        fts = [q for q in queries if re.search(r"\bposts_search\b", q["sql"])]
+        self.assertEqual(fts, [])
+        self.assertFalse(SearchEntry.objects.exists())
+
+
+@override_settings(FEED_PAGE_SIZE=2)
+class HomeFeedTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user("author", "author@example.com")
+        self.posts = [
+            Post.objects.create(title=str(i), image="x", author=author)
+            for i in range(5)
+        ]
+        # Posts created in the same instant are told apart by their id.
+        Post.objects.filter(id__in=[p.id for p in self.posts[1:3]]).update(
+            created=self.posts[1].created
+        )
+
+    def test_pages_through_every_post_once_then_ends(self):
+        expected = list(Post.objects.order_by("-created", "-id"))
+        response = self.client.get("/")
+        seen = list(response.context["posts"])
+        self.assertContains(response, "?cursor=")
+
+        while response.context["next_cursor"]:
+            response = self.client.get(
+                f"/?cursor={response.context['next_cursor']}",
+                HTTP_HX_REQUEST="true",
+            )
+            seen += response.context["posts"]
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(response["HX-Trigger"], "feed-end")
+        self.assertNotContains(response, "?cursor=")
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get("/?cursor=bogus", HTTP_HX_REQUEST="true")
+        self.assertEqual(response.status_code, 400)
+
+
+class CategoryTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("author", "author@example.com")
+        self.tag = Tag.objects.create(name="Night", slug="night", image="n.png")
+        self.other = Tag.objects.create(name="Sea", slug="sea", image="s.png")
+
+    def post(self, title: str) -> Post:
+        return Post.objects.create(title=title, image="x", author=self.author)
+
+    def test_post_count_follows_links_and_deletes(self):
+        first, second = self.post("Moon"), self.post("Stars")
+        first.tags.add(self.tag, self.other)
+        first.tags.add(self.tag)
+        self.tag.post_set.add(second)
+        self.assertEqual(PostTag.objects.get(post=second).created, second.created)
+
+        first.tags.remove(self.other, self.tag)
+        second.delete()
+        first.tags.set([self.other])
+        self.assertQuerySetEqual(
+            Tag.objects.order_by("slug").values_list("post_count", flat=True), [0, 1]
+        )
+
+    def test_registry_reloads_after_category_changes(self):
+        self.assertCountEqual([t.slug for t in tag_registry.all()], ["night", "sea"])
+        with self.assertNumQueries(0):
+            self.assertEqual(tag_registry.get("night").name, "Night")
+
+        self.tag.name = "Dark"
+        self.tag.save()
+        self.other.delete()
+        self.assertEqual(tag_registry.get("night").name, "Dark")
+        self.assertIsNone(tag_registry.get("sea"))
+
+        # Another worker's change, seen once the stamp expires.
+        Tag.objects.filter(id=self.tag.id).update(name="Deep")
+        cache.delete(VERSION_KEY)
+        self.assertEqual(tag_registry.get("night").name, "Deep")
+
+    def test_tagged_posts_do_not_reload_registry(self):
+        tag_registry.all()
+        cache.delete(COUNTS_KEY)
+        self.post("Moon").tags.add(self.tag)
+        with self.assertNumQueries(1):
+            self.assertEqual(tag_registry.get("night").name, "Night")
+            self.assertEqual(post_counts()[self.tag.id], 1)
+
+    @override_settings(FEED_PAGE_SIZE=2)
+    def test_feed_pages_through_category_newest_first(self):
+        posts = [self.post(f"Night {i}") for i in range(3)]
+        for post in posts:
+            post.tags.add(self.tag)
+        self.post("Untagged")
+
+        response = self.client.get("/category/night/")
+        self.assertEqual(list(response.context["posts"]), posts[:0:-1])
+        response = self.client.get(
+            f"/category/night/?cursor={response.context['next_cursor']}",
+            HTTP_HX_REQUEST="true",
+        )
+        self.assertEqual(list(response.context["posts"]), posts[:1])
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("author", "author@example.com")
+        self.post = Post.objects.create(title="Moon", image="x", author=self.author)
+
+    def comment(self, body: str, likes: int = 0) -> Comment:
+        return Comment.objects.create(
+            parent_post=self.post, author=self.author, body=body, likes_count=likes
+        )
+
+    def get(self, path: str) -> dict:
+        response = self.client.get(path, HTTP_HX_REQUEST="true")
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    @override_settings(COMMENTS_PAGE_SIZE=2)
+    def test_comments_page_newest_and_top_first(self):
+        old, liked, new = (
+            self.comment("old", 5),
+            self.comment("liked", 9),
+            self.comment("new"),
+        )
+
+        page = self.get(f"/post/{self.post.id}/")
+        self.assertEqual(list(page["comments"]), [new, liked])
+        page = self.get(f"/post/{self.post.id}/?cursor={page['next_cursor']}")
+        self.assertEqual((list(page["comments"]), page["next_cursor"]), ([old], None))
+
+        page = self.get(f"/post/{self.post.id}/?top")
+        self.assertEqual(
+            (list(page["comments"]), page["next_cursor"]), ([liked, old], None)
+        )
+
+        response = self.client.get(f"/post/{self.post.id}/?cursor=bogus")
+        self.assertEqual(response.status_code, 400)
+
+    def test_comments_of_unknown_post_are_not_found(self):
+        self.post.delete()
+        response = self.client.get(f"/post/{self.post.id}/", HTTP_HX_REQUEST="true")
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(REPLIES_PAGE_SIZE=2)
+    def test_replies_load_per_comment(self):
+        comment = self.comment("thread")
+        replies = [
+            Reply.objects.create(
+                parent_comment=comment, author=self.author, body=str(i)
+            )
+            for i in range(3)
+        ]
+
+        with self.assertNumQueries(1):
+            page = self.get(f"/comment/{comment.id}/replies/")
+        self.assertEqual(list(page["replies"]), replies[:0:-1])
+        page = self.get(f"/comment/{comment.id}/replies/?cursor={page['next_cursor']}")
+        self.assertEqual(list(page["replies"]), replies[:1])
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user("author", "author@example.com")
+        self.post = Post.objects.create(
+            title="Moon", image="x", body="Full moon", author=self.author
+        )
+        Comment.objects.create(parent_post=self.post, author=self.author, body="Hi")
+        self.tag = Tag.objects.create(name="Night", slug="night", image="n.png")
+        self.client.force_login(self.author)
+
+    def test_edit_renders_new_body(self):
+        self.assertContains(self.client.get("/"), "Full moon")
+
+        data = {"body": "Half moon", "tags": [self.tag.pk]}
+        self.client.post(f"/post/edit/{self.post.id}/", data)
+
+        response = self.client.get("/")
+        self.assertContains(response, "Half moon")
+        self.assertNotContains(response, "Full moon")
+
+    def test_invalid_edit_shows_errors_and_keeps_post(self):
+        response = self.client.post(
+            f"/post/edit/{self.post.id}/", {"body": "Half moon"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.body, self.post.version), ("Full moon", 1))
+
+    def test_profile_edit_renders_new_name_on_posts_and_comments(self):
+        comments = {"path": f"/post/{self.post.id}/", "HTTP_HX_REQUEST": "true"}
+        self.assertNotContains(self.client.get("/"), "Selene")
+        self.assertNotContains(self.client.get(**comments), "Selene")
+
+        data = {"realname": "Selene", "email": "author@example.com"}
+        self.client.post("/profile/edit/", {**data, "location": "", "bio": ""})
+
+        self.assertContains(self.client.get("/"), "Selene")
+        self.assertContains(self.client.get(**comments), "Selene")
+
+
+class UserStatsTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("author", "author@example.com")
+        self.fans = [
+            User.objects.create_user(f"fan{i}", f"fan{i}@example.com") for i in range(2)
+        ]
+
+    def post(self, title: str) -> Post:
+        return Post.objects.create(title=title, image="x", author=self.author)
+
+    def snapshot(self) -> tuple:
+        stats = UserStats.objects.get(user=self.author)
+        return (
+            stats.posts_count,
+            stats.likes_received,
+            stats.top_posts,
+            stats.top_comments,
+        )
+
+    @override_settings(USER_STATS_TOP_SIZE=2)
+    def test_incremental_updates_match_rebuild(self):
+        posts = [self.post(str(i)) for i in range(3)]
+        comment = Comment.objects.create(
+            parent_post=posts[0], author=self.fans[0], body="hi"
+        )
+        Reply.objects.create(parent_comment=comment, author=self.author, body="hey")
+        for fan in self.fans:
+            toggle_like(fan, posts[1])
+        toggle_like(self.fans[0], posts[2])
+        toggle_like(self.fans[1], posts[1])
+        toggle_like(self.author, comment)
+        posts[2].delete()
+
+        incremental = self.snapshot()
+        self.assertEqual(incremental, (2, 1, [[posts[1].id.hex, 1]], []))
+        self.assertEqual(UserStats.objects.get(user=self.fans[0]).likes_received, 1)
+        rebuild_user_stats()
+        self.assertEqual(self.snapshot(), incremental)
+
+    @override_settings(USER_STATS_TOP_SIZE=2)
+    def test_cascaded_comments_leave_top_list(self):
+        doomed, kept = self.post("Doomed"), self.post("Kept")
+        comments = [
+            Comment.objects.create(parent_post=post, author=self.fans[0], body="hi")
+            for post in (doomed, doomed, kept)
+        ]
+        for comment in comments[:2]:
+            toggle_like(self.author, comment)
+            toggle_like(self.fans[1], comment)
+        toggle_like(self.author, comments[2])
+
+        doomed.delete()
+        stats = UserStats.objects.get(user=self.fans[0])
+        self.assertEqual(stats.top_comments, [[comments[2].id.hex, 1]])
+
+    def test_profile_reads_totals_and_top_posts_from_stats(self):
+        quiet, popular = self.post("Quiet"), self.post("Popular")
+        for fan in self.fans:
+            toggle_like(fan, popular)
+
+        response = self.client.get("/author/")
+        self.assertContains(response, "Likes received")
+        self.assertEqual(response.context["stats"].posts_count, 2)
+        with self.assertNumQueries(3):
+            response = self.client.get("/author/?top-posts", HTTP_HX_REQUEST="true")
+        self.assertEqual(response.context["posts"], [popular])
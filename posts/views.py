@@ -1,17 +1,44 @@
-import requests
-from bs4 import BeautifulSoup
+from uuid import UUID
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
-from django.db.models import Count
-from django.http import HttpRequest, HttpResponse
+from django.db import transaction
+from django.db.models import F
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBadRequest,
+)
 from django.shortcuts import get_object_or_404, redirect, render
 
-from posts.core import CommentCreateForm, PostCreateForm, PostEditForm, ReplyCreateForm
+from core.routers import read_from_replica
+from posts.core import (
+    NEWEST_COMMENTS,
+    TOP_COMMENTS,
+    CommentCreateForm,
+    PostCreateForm,
+    PostEditForm,
+    ReplyCreateForm,
+    category_queryset,
+    comment_queryset,
+    feed_queryset,
+    paginate_feed,
+)
+from posts.core.flickr import known_metadata, normalize_photo_url
+from posts.core.images import get_variant
+from posts.core.jobs import enqueue
+from posts.core.leaderboard import fill_leaderboard, update_leaderboard
+from posts.core.likes import buffer_like, toggle_like
+from posts.core.search import search
+from posts.core.tags import tag_registry
 
 from .models import *
 
 
+@read_from_replica
 def home_view(request: HttpRequest, tag=None) -> HttpResponse:
     """
     Render the home page with a list of posts, optionally filtered by a tag.
@@ -19,31 +46,46 @@ def home_view(request: HttpRequest, tag=None) -> HttpResponse:
     If a tag is provided, the view filters posts to include only those
     associated with the specified tag. Otherwise, it displays all posts.
 
+    The category is looked up in the in-process tag registry, and its feed is
+    read from its `PostTag` rows, which are indexed in post order, instead of
+    joining all of its posts.
+
+    Posts are paginated with a keyset cursor on `(created, id)`. HTMX requests
+    for the next page pass the `cursor` returned with the previous one; once
+    the feed is exhausted the response carries a `feed-end` HX-Trigger and no
+    further loader is rendered, so the client stops requesting pages.
+
     Args:
         request (HttpRequest): The HTTP request object containing metadata about the request.
         tag (str, optional): The slug of the tag used to filter posts. Defaults to None.
 
     Returns:
         HttpResponse: A rendered HTML response displaying the list of posts,
-        filtered by the specified tag if provided.
+        filtered by the specified tag if provided, or a 400 response if the
+        cursor is invalid.
     """
-    if tag:
-        posts = Post.objects.filter(tags__slug=tag)
-        tag = get_object_or_404(Tag, slug=tag)
-    else:
-        posts = Post.objects.all()
-
-    paginator = Paginator(posts, 3)
-    page = int(request.GET.get("page", 1))
+    cursor = request.GET.get("cursor")
     try:
-        posts = paginator.page(page)
-    except:
-        return HttpResponse("")
+        if tag:
+            tag = tag_registry.get(tag)
+            if tag is None:
+                raise Http404("No such category")
+            entries, next_cursor = paginate_feed(
+                category_queryset(tag), cursor, key=("created", "post_id")
+            )
+            posts = [entry.post for entry in entries]
+        else:
+            posts, next_cursor = paginate_feed(feed_queryset(), cursor)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor")
 
-    context = {"posts": posts, "tag": tag, "page": page}
+    context = {"posts": posts, "tag": tag, "next_cursor": next_cursor}
 
     if request.htmx:
-        return render(request, "snippets/loop_home_posts.html", context)
+        response = render(request, "snippets/loop_home_posts.html", context)
+        if next_cursor is None:
+            response["HX-Trigger"] = "feed-end"
+        return response
 
     return render(request, "posts/home.html", context)
 
@@ -62,12 +104,11 @@ def post_create_view(request: HttpRequest) -> HttpResponse:
             - A redirect to the home page upon successful post creation (POST request).
 
     Key Operations:
-        - Fetch metadata (image, title, artist) from the provided URL.
-        - Save the data to the `Post` model.
-
-    Dependencies:
-        - requests: Fetch external web page content.
-        - BeautifulSoup: Parse HTML to extract specific data.
+        - Reuse the metadata (image, title, artist) of an earlier post of the
+          same photo, if any.
+        - Otherwise save the post right away in the `pending` state and enqueue
+          a background job that fetches the metadata from the provided URL;
+          see `posts.tasks`.
     """
     form = PostCreateForm()
 
@@ -75,41 +116,72 @@ def post_create_view(request: HttpRequest) -> HttpResponse:
         form = PostCreateForm(request.POST)
         if form.is_valid():
             post = form.save(commit=False)
+            post.author = request.user
+            post.url = normalize_photo_url(post.url)
+
+            metadata = known_metadata(post.url)
+            if metadata:
+                for field, value in metadata.items():
+                    setattr(post, field, value)
+            else:
+                post.status = Post.PENDING
+
+            with transaction.atomic():
+                post.save()
+                form.save_m2m()
+                if post.status == Post.PENDING:
+                    enqueue("post-metadata", post.id)
+            return redirect("home")
 
-            website = requests.get(form.data["url"])
-            sourcecode = BeautifulSoup(website.text, "html.parser")
+    return render(request, "posts/post_create.html", {"form": form})
 
-            find_image = sourcecode.select(
-                'meta[content^="https://live.staticflickr.com/"]'
-            )
-            image = find_image[0]["content"]
-            post.image = image
 
-            find_title = sourcecode.select("h1.photo-title")
-            title = find_title[0].text.strip()
-            post.title = title
+def post_image_view(request: HttpRequest, pk: UUID, width: int) -> HttpResponse:
+    """
+    Serve the image of a post scaled to one of the `IMAGE_VARIANT_WIDTHS`.
 
-            find_artist = sourcecode.select("a.owner-name")
-            artist = find_artist[0].text.strip()
-            post.artist = artist
+    The original is fetched from Flickr once; each variant is generated with
+    Pillow on first request and kept in a size-bounded disk cache. Responses
+    may be cached by browsers and proxies for a year, since the image of a
+    resolved post never changes.
 
-            post.author = request.user
+    Args:
+        request (HttpRequest): The HTTP request object.
+        pk (UUID): The primary key (id) of the post.
+        width (int): The requested width of the image in pixels.
 
-            post.save()
-            form.save_m2m()
-            return redirect("home")
+    Returns:
+        HttpResponse:
+            - The JPEG variant of the image.
+            - A redirect to the original image if it cannot be fetched or resized.
 
-    return render(request, "posts/post_create.html", {"form": form})
+    Raises:
+        Http404: If the width is not allowed or the post has no resolved image.
+    """
+    if width not in settings.IMAGE_VARIANT_WIDTHS:
+        raise Http404("Unsupported image width")
+    post = get_object_or_404(Post.objects.only("image"), id=pk, status=Post.READY)
+
+    try:
+        image = open(get_variant(post.image, width), "rb")
+    except (OSError, ValueError):
+        return redirect(post.image)
+
+    response = FileResponse(image, content_type="image/jpeg")
+    response["Cache-Control"] = (
+        f"public, max-age={settings.IMAGE_CACHE_MAX_AGE}, immutable"
+    )
+    return response
 
 
 @login_required
-def post_delete_view(request: HttpRequest, pk: str) -> HttpResponse:
+def post_delete_view(request: HttpRequest, pk: UUID) -> HttpResponse:
     """
     Handle the deletion of a post or raise a 404 error if not found.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata about the request.
-        pk (str): The primary key (id) of the post to be deleted.
+        pk (UUID): The primary key (id) of the post to be deleted.
 
     Returns:
         HttpResponse:
@@ -122,10 +194,12 @@ def post_delete_view(request: HttpRequest, pk: str) -> HttpResponse:
     Context:
         - `post`: The post instance to be displayed for confirmation.
     """
-    post = get_object_or_404(Post, id=pk, author=request.user)
+    post = get_object_or_404(feed_queryset(), id=pk, author=request.user)
 
     if request.method == "POST":
         post.delete()
+        fill_leaderboard(Post)
+        fill_leaderboard(Comment)
         messages.success(request, "Post deleted")
         return redirect("home")
 
@@ -133,14 +207,14 @@ def post_delete_view(request: HttpRequest, pk: str) -> HttpResponse:
 
 
 @login_required
-def post_edit_view(request: HttpRequest, pk: str) -> HttpResponse:
+def post_edit_view(request: HttpRequest, pk: UUID) -> HttpResponse:
     """
     Handle the editing of an existing post or raise a 404 error if not found.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata
         about the request.
-        pk (str): The primary key (id) of the post to be edited.
+        pk (UUID): The primary key (id) of the post to be edited.
 
     Returns:
         HttpResponse:
@@ -155,8 +229,11 @@ def post_edit_view(request: HttpRequest, pk: str) -> HttpResponse:
 
     if request.method == "POST":
         form = PostEditForm(request.POST, instance=post)
-        if form.is_valid:
-            form.save()
+        if form.is_valid():
+            post = form.save(commit=False)
+            post.version += 1
+            post.save()
+            form.save_m2m()
             messages.success(request, "Post updated")
             return redirect("home")
 
@@ -164,55 +241,138 @@ def post_edit_view(request: HttpRequest, pk: str) -> HttpResponse:
     return render(request, "posts/post_edit.html", context)
 
 
-def post_page_view(request: HttpRequest, pk: str) -> HttpResponse:
+@read_from_replica
+def post_page_view(request: HttpRequest, pk: UUID) -> HttpResponse:
     """
     Display the details of a specific post or raise a 404 error if not found.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata
         about the request.
-        pk (str): The primary key (id) of the post to display.
+        pk (UUID): The primary key (id) of the post to display.
 
     Returns:
         HttpResponse: A rendered HTML response displaying the post's details.
 
+    Comments are paginated with a keyset cursor, newest first or, with `top`,
+    most liked first, and rendered with their authors joined; replies are
+    loaded per comment by `comment_replies_view` when they are opened. HTMX
+    requests get just a page of comments, so a post with thousands of them
+    opens as fast as one with ten; for those the post is only checked to exist.
+
     Raises:
         Http404: If no `Post` object is found with the given primary key.
     """
-    post = get_object_or_404(Post, id=pk)
+    if not request.htmx:
+        post = get_object_or_404(feed_queryset(), id=pk)
+    elif not Post.objects.filter(id=pk).exists():
+        raise Http404("No such post")
+
+    top = "top" in request.GET
+    comments = comment_queryset(Comment.objects.filter(parent_post_id=pk))
+    if top:
+        comments = comments.filter(likes_count__gt=0)
+    try:
+        comments, next_cursor = paginate_feed(
+            comments,
+            request.GET.get("cursor"),
+            settings.COMMENTS_PAGE_SIZE,
+            key=TOP_COMMENTS if top else NEWEST_COMMENTS,
+        )
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor")
 
-    commentform = CommentCreateForm()
-    replyform = ReplyCreateForm()
+    context = {
+        "post_id": pk,
+        "comments": comments,
+        "top": top,
+        "next_cursor": next_cursor,
+        "replyform": ReplyCreateForm(),
+    }
 
     if request.htmx:
-        if "top" in request.GET:
-            comments = (
-                post.comments.annotate(likes_count=Count("likes"))
-                .filter(likes_count__gt=0)
-                .order_by("-likes_count")
-            )
-        else:
-            comments = post.comments.all()
-        return render(
-            request,
-            "snippets/loop_postpage_comments.html",
-            {"comments": comments, "replyform": replyform},
+        return render(request, "snippets/loop_postpage_comments.html", context)
+
+    context.update(post=post, commentform=CommentCreateForm())
+    return render(request, "posts/post_page.html", context)
+
+
+@read_from_replica
+def comment_replies_view(request: HttpRequest, pk: UUID) -> HttpResponse:
+    """
+    Render a page of a comment's replies, newest first.
+
+    The replies of a comment are requested by HTMX when they are opened, so
+    the post page does not load the replies of every comment up front.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata about the request.
+        pk (UUID): The primary key (id) of the comment.
+
+    Returns:
+        HttpResponse: The replies partial, or a 400 response if the cursor is
+        invalid.
+    """
+    replies = comment_queryset(Reply.objects.filter(parent_comment_id=pk))
+    try:
+        replies, next_cursor = paginate_feed(
+            replies, request.GET.get("cursor"), settings.REPLIES_PAGE_SIZE
         )
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor")
 
-    context = {"post": post, "commentform": commentform, "replyform": replyform}
+    context = {"comment_id": pk, "replies": replies, "next_cursor": next_cursor}
+    return render(request, "snippets/loop_comment_replies.html", context)
 
-    return render(request, "posts/post_page.html", context)
+
+@read_from_replica
+def search_view(request: HttpRequest) -> HttpResponse:
+    """
+    Search posts and comments, rendering the best matches first.
+
+    The query in `q` is matched against the full-text index of post titles,
+    captions and artists and of comment bodies. Results are paginated by
+    `page`; HTMX requests get just the result cards, which the search box and
+    the infinite-scroll loader swap into the page.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing metadata about the request.
+
+    Returns:
+        HttpResponse: The search page, the results partial for HTMX requests,
+        or a 400 response if the page number is invalid.
+    """
+    query = request.GET.get("q", "").strip()
+    try:
+        page = int(request.GET.get("page", 1))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid page")
+    if page < 1:
+        return HttpResponseBadRequest("Invalid page")
+
+    results, has_next = search(query, page)
+    context = {
+        "query": query,
+        "results": results,
+        "next_page": page + 1 if has_next else None,
+        "replyform": ReplyCreateForm(),
+    }
+
+    if request.htmx:
+        return render(request, "snippets/loop_search_results.html", context)
+
+    return render(request, "posts/search.html", context)
 
 
 @login_required
-def comment_sent(request: HttpRequest, pk: str) -> HttpResponse:
+def comment_sent(request: HttpRequest, pk: UUID) -> HttpResponse:
     """
     Handle the submission of a comment for a specific post.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata
         about the request.
-        pk (str): The primary key (id) of the post for which the comment is being submitted.
+        pk (UUID): The primary key (id) of the post for which the comment is being submitted.
 
     Returns:
         HttpResponse: A redirect to the post page after successfully adding the comment.
@@ -229,7 +389,12 @@ def comment_sent(request: HttpRequest, pk: str) -> HttpResponse:
             comment = form.save(commit=False)
             comment.author = request.user
             comment.parent_post = post
-            comment.save()
+            with transaction.atomic():
+                comment.save()
+                Post.objects.filter(id=post.id).update(
+                    comments_count=F("comments_count") + 1
+                )
+            post.refresh_from_db(fields=["comments_count"])
 
     context = {"comment": comment, "post": post, "replyform": replyform}
 
@@ -237,13 +402,13 @@ def comment_sent(request: HttpRequest, pk: str) -> HttpResponse:
 
 
 @login_required
-def comment_delete_view(request: HttpRequest, pk: str) -> HttpResponse:
+def comment_delete_view(request: HttpRequest, pk: UUID) -> HttpResponse:
     """
     Handle the deletion of a comment or raise a 404 error if not found.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata about the request.
-        pk (str): The primary key (id) of the comment to be deleted.
+        pk (UUID): The primary key (id) of the comment to be deleted.
 
     Returns:
         HttpResponse:
@@ -259,7 +424,12 @@ def comment_delete_view(request: HttpRequest, pk: str) -> HttpResponse:
     post = get_object_or_404(Comment, id=pk, author=request.user)
 
     if request.method == "POST":
-        post.delete()
+        with transaction.atomic():
+            post.delete()
+            Post.objects.filter(id=post.parent_post_id).update(
+                comments_count=F("comments_count") - 1
+            )
+        fill_leaderboard(Comment)
         messages.success(request, "Comment deleted")
         return redirect("post", post.parent_post.id)
 
@@ -267,14 +437,14 @@ def comment_delete_view(request: HttpRequest, pk: str) -> HttpResponse:
 
 
 @login_required
-def reply_sent(request: HttpRequest, pk: str) -> HttpResponse:
+def reply_sent(request: HttpRequest, pk: UUID) -> HttpResponse:
     """
     Handle the submission of a reply for a specific comment.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata
         about the request.
-        pk (str): The primary key (id) of the post for which the reply is being submitted.
+        pk (UUID): The primary key (id) of the post for which the reply is being submitted.
 
     Returns:
         HttpResponse: A redirect to the post page after successfully adding the reply.
@@ -291,7 +461,12 @@ def reply_sent(request: HttpRequest, pk: str) -> HttpResponse:
             reply = form.save(commit=False)
             reply.author = request.user
             reply.parent_comment = comment
-            reply.save()
+            with transaction.atomic():
+                reply.save()
+                Comment.objects.filter(id=comment.id).update(
+                    replies_count=F("replies_count") + 1
+                )
+            comment.refresh_from_db(fields=["replies_count"])
 
     context = {"comment": comment, "reply": reply, "replyform": replyform}
 
@@ -299,13 +474,13 @@ def reply_sent(request: HttpRequest, pk: str) -> HttpResponse:
 
 
 @login_required
-def reply_delete_view(request: HttpRequest, pk: str) -> HttpResponse:
+def reply_delete_view(request: HttpRequest, pk: UUID) -> HttpResponse:
     """
     Handle the deletion of a reply or raise a 404 error if not found.
 
     Args:
         request (HttpRequest): The HTTP request object containing metadata about the request.
-        pk (str): The primary key (id) of the reply to be deleted.
+        pk (UUID): The primary key (id) of the reply to be deleted.
 
     Returns:
         HttpResponse:
@@ -321,7 +496,11 @@ def reply_delete_view(request: HttpRequest, pk: str) -> HttpResponse:
     reply = get_object_or_404(Reply, id=pk, author=request.user)
 
     if request.method == "POST":
-        reply.delete()
+        with transaction.atomic():
+            reply.delete()
+            Comment.objects.filter(id=reply.parent_comment_id).update(
+                replies_count=F("replies_count") - 1
+            )
         messages.success(request, "Reply deleted")
         return redirect("post", reply.parent_comment.parent_post.id)
 
@@ -332,6 +511,11 @@ def like_toggle(model: type) -> callable:
     """
     A decorator that toggles the like status for a given model instance.
 
+    The like row is deleted or inserted by `toggle_like` in the same transaction
+    as the instance's `likes_count` update, so the counter never drifts from the
+    likes, even under concurrent double-clicks. With `LIKE_BUFFER` enabled the
+    toggle is only staged for `manage.py flush_likes`.
+
     Args:
         model (type): The model class for which the like functionality is being implemented,
                       e.g., Post, Comment, or Reply.
@@ -364,13 +548,12 @@ def like_toggle(model: type) -> callable:
                 HttpResponse: The response generated by the wrapped view function.
             """
             post = get_object_or_404(model, id=kwargs.get("pk"))
-            user_exist = post.likes.filter(username=request.user.username).exists()
 
-            if post.author != request.user:
-                if user_exist:
-                    post.likes.remove(request.user)
-                else:
-                    post.likes.add(request.user)
+            if post.author != request.user and settings.LIKE_BUFFER:
+                buffer_like(request.user, post)
+            elif post.author != request.user:
+                toggle_like(request.user, post)
+                update_leaderboard(post)
 
             return func(request, post)
 
@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 from django.forms import ModelForm
 
 from ..models import *
@@ -8,7 +9,8 @@ class ProfileForm(ModelForm):
     """
     A form for editing the user's profile.
 
-    This form is based on the Profile model and excludes the "user" field.
+    This form is based on the Profile model and excludes the "user" field and
+    the generated "avatar_variants" and "version" fields.
     It includes customized labels and widgets for specific fields.
 
     Attributes:
@@ -21,8 +23,20 @@ class ProfileForm(ModelForm):
 
     class Meta:
         model = Profile
-        exclude = ["user"]
+        exclude = ["user", "avatar_variants", "version"]
         labels = {
             "realname": "Name",
         }
         widgets = {"image": forms.FileInput(), "bio": forms.Textarea(attrs={"rows": 3})}
+
+    def clean_image(self):
+        """
+        Reject avatar uploads larger than `AVATAR_MAX_UPLOAD_BYTES`.
+
+        Returns:
+            File: The uploaded image.
+        """
+        image = self.cleaned_data.get("image")
+        if image and image.size > settings.AVATAR_MAX_UPLOAD_BYTES:
+            raise forms.ValidationError("The image is too large.")
+        return image
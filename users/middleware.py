@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import HttpRequest
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .models import Profile
+
+
+def profile_cache_key(user_id) -> str:
+    """
+    Return the cache key under which the profile of a signed-in user is kept.
+
+    Args:
+        user_id: The primary key of the user.
+
+    Returns:
+        str: The cache key.
+    """
+    return f"auth:profile:{user_id}"
+
+
+def forget_cached_user(user_id) -> None:
+    """
+    Drop the cached profile of a user.
+
+    The entry is removed right away, so the writing request reloads its own
+    change, and again once the transaction commits, so a request that cached
+    the row in between does not keep the uncommitted state.
+
+    Args:
+        user_id: The primary key of the user.
+    """
+
+    def forget():
+        cache.delete(profile_cache_key(user_id))
+
+    forget()
+    transaction.on_commit(forget)
+
+
+def verified(request: HttpRequest, user: User) -> bool:
+    """
+    Check the password hash stored in the session against the user's.
+
+    Mirrors `django.contrib.auth.get_user`: a session whose hash was signed
+    with a fallback secret key is upgraded, and any other mismatch (e.g. after
+    a password change) flushes the session.
+
+    Args:
+        request (HttpRequest): The request carrying the session.
+        user (User): The user the session belongs to.
+
+    Returns:
+        bool: True if the session is still valid for the user.
+    """
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if session_hash and constant_time_compare(
+        session_hash, user.get_session_auth_hash()
+    ):
+        return True
+    if session_hash and any(
+        constant_time_compare(session_hash, fallback)
+        for fallback in user.get_session_auth_fallback_hash()
+    ):
+        request.session.cycle_key()
+        request.session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        return True
+    request.session.flush()
+    return False
+
+
+def load_user(user_id) -> User | None:
+    """
+    Read a user and attach their profile, in one query at most.
+
+    Only the profile is cached: the user row, with the password hash and
+    `is_active` flag the session is checked against, is read on every
+    request, so a password change or deactivation ends the user's sessions
+    on every worker at once, as with the stock middleware. The profile only
+    feeds pages such as the header, and a copy kept by another worker is at
+    most `AUTH_PROFILE_CACHE_TIMEOUT` seconds old.
+
+    Args:
+        user_id: The primary key of the user.
+
+    Returns:
+        User | None: The user with `profile` loaded, or None if there is none.
+    """
+    key = profile_cache_key(user_id)
+    values = cache.get(key)
+    if values is not None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            names = [field.attname for field in Profile._meta.concrete_fields]
+            user.profile = Profile.from_db(DEFAULT_DB_ALIAS, names, values)
+        return user
+
+    user = User.objects.select_related("profile").filter(pk=user_id).first()
+    profile = getattr(user, "profile", None) if user is not None else None
+    if profile is not None:
+        values = [getattr(profile, f.attname) for f in Profile._meta.concrete_fields]
+        cache.set(key, values, settings.AUTH_PROFILE_CACHE_TIMEOUT)
+    return user
+
+
+def get_user(request: HttpRequest) -> User | AnonymousUser:
+    """
+    Return the user signed in to the session, together with their profile.
+
+    Args:
+        request (HttpRequest): The request carrying the session.
+
+    Returns:
+        User | AnonymousUser: The signed-in user, or AnonymousUser.
+    """
+    try:
+        user_id = User._meta.pk.to_python(request.session[SESSION_KEY])
+        backend = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    user = load_user(user_id)
+    if user is None or not user.is_active or not verified(request, user):
+        return AnonymousUser()
+    user.backend = backend
+    return user
+
+
+class ProfileAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    Replace `AuthenticationMiddleware`, loading `request.user` with `get_user`.
+
+    Like the stock middleware the user is only loaded when it is first used,
+    and `request.auser` keeps working for async code.
+    """
+
+    def process_request(self, request: HttpRequest):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_profile_avatar_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
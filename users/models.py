@@ -14,6 +14,11 @@ class Profile(models.Model):
         email (str): A unique and optional email address for the profile.
         location (str): An optional field for the user's location, limited to 20 characters.
         bio (str): An optional field for the user's biography.
+        avatar_variants (dict): The storage names of the resized copies of `image`,
+            keyed by `<size>.<format>` (e.g. `small.webp`), filled in by the
+            background avatar job.
+        version (int): The content version of the profile, bumped on every edit and
+            avatar update; part of the fragment cache key of the user's cards.
         created (datetime): The timestamp indicating when the profile was created, automatically set at creation.
 
     Methods:
@@ -27,25 +32,53 @@ class Profile(models.Model):
     email = models.EmailField(unique=True, null=True)
     location = models.CharField(max_length=20, null=True, blank=True)
     bio = models.TextField(null=True, blank=True)
+    avatar_variants = models.JSONField(default=dict, blank=True)
+    version = models.PositiveIntegerField(default=1)
     created = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return str(self.user)
 
-    @property
-    def avatar(self):
+    def avatar_url(self, size="small"):
         """
-        Returns the URL of the user's avatar image if available, otherwise returns a default image URL.
+        Returns the URL of the user's avatar image resized for a render size.
+
+        Args:
+            size (str): One of the `AVATAR_SIZES`, e.g. `small` or `medium`.
 
         Returns:
-            str: The URL of the user's avatar image or a default image URL.
+            str: The URL of the resized avatar, of the uploaded image while it is
+                 still being processed, or of a default image if there is none.
         """
+        variant = self.avatar_variants.get(f"{size}.webp")
+        if variant:
+            return self.image.storage.url(variant)
         try:
             avatar = self.image.url
         except:
             avatar = static("images/avatar_default.svg")
         return avatar
 
+    @property
+    def avatar(self):
+        """
+        Returns the URL of the user's avatar image sized for small renders (feed, comments, header).
+
+        Returns:
+            str: The URL of the user's avatar image or a default image URL.
+        """
+        return self.avatar_url("small")
+
+    @property
+    def avatar_medium(self):
+        """
+        Returns the URL of the user's avatar image sized for the profile page.
+
+        Returns:
+            str: The URL of the user's avatar image or a default image URL.
+        """
+        return self.avatar_url("medium")
+
     @property
     def name(self):
         """
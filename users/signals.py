@@ -1,9 +1,24 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.shortcuts import get_object_or_404
 
+from .middleware import forget_cached_user
 from .models import Profile
+from .tasks import delete_avatar_variants
+
+
+def email_saved(update_fields) -> bool:
+    """
+    Tell whether a save may have written the `email` column.
+
+    Args:
+        update_fields (frozenset | None): The `update_fields` of the save, None
+            for a full save.
+
+    Returns:
+        bool: False if the save was limited to other fields.
+    """
+    return update_fields is None or "email" in update_fields
 
 
 @receiver(post_save, sender=User)
@@ -11,6 +26,11 @@ def create_profile(sender, instance, created, **kwargs):
     """
     Signal receiver to handle Profile creation and update when a User is saved.
 
+    Saves that name their `update_fields` without `email`, such as the
+    `last_login` update of every login, are ignored. Otherwise the email is
+    copied with a single UPDATE that only matches when it differs; `update()`
+    sends no signals, so `update_user` is not triggered in turn.
+
     Args:
         sender (type): The model class (User) that sent the signal.
         instance (User): The User instance being saved.
@@ -19,15 +39,15 @@ def create_profile(sender, instance, created, **kwargs):
 
     Side Effects:
         - Creates a new Profile instance if the User is newly created.
-        - Updates the Profile's email field if the User already exists.
+        - Updates the Profile's email field if the User's email changed.
     """
     user = instance
     if created:
         Profile.objects.create(user=user, email=user.email)
-    else:
-        profile = get_object_or_404(Profile, user=user)
-        profile.email = user.email
-        profile.save()
+    elif email_saved(kwargs["update_fields"]):
+        Profile.objects.filter(user=user).exclude(email=user.email).update(
+            email=user.email
+        )
 
 
 @receiver(post_save, sender=Profile)
@@ -35,6 +55,9 @@ def update_user(sender, instance, created, **kwargs):
     """
     Signal receiver to handle User email updates when a Profile is saved.
 
+    Like `create_profile`, this only issues a single conditional UPDATE, and
+    only when the save may have changed the email.
+
     Args:
         sender (type): The model class (Profile) that sent the signal.
         instance (Profile): The Profile instance being saved.
@@ -45,8 +68,58 @@ def update_user(sender, instance, created, **kwargs):
         - Updates the associated User's email field if it differs from the Profile's email.
     """
     profile = instance
-    if created == False:
-        user = get_object_or_404(User, id=profile.user.id)
-        if user.email != profile.email:
-            user.email = profile.email
-            user.save()
+    if not created and email_saved(kwargs["update_fields"]):
+        email = profile.email or ""
+        User.objects.filter(id=profile.user_id).exclude(email=email).update(email=email)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    """
+    Signal receiver to drop the cached Profile of a User saved or deleted.
+
+    Saving a User may copy its email to the Profile with `update()`.
+
+    Args:
+        sender (type): The model class (User) that sent the signal.
+        instance (User): The User instance being saved or deleted.
+        **kwargs: Additional keyword arguments provided by the signal.
+
+    Side Effects:
+        - Removes the cached Profile used by `ProfileAuthenticationMiddleware`.
+    """
+    forget_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def forget_profile(sender, instance, **kwargs):
+    """
+    Signal receiver to drop the cached copy of a Profile saved or deleted.
+
+    Args:
+        sender (type): The model class (Profile) that sent the signal.
+        instance (Profile): The Profile instance being saved or deleted.
+        **kwargs: Additional keyword arguments provided by the signal.
+
+    Side Effects:
+        - Removes the cached Profile used by `ProfileAuthenticationMiddleware`.
+    """
+    forget_cached_user(instance.user_id)
+
+
+@receiver(post_delete, sender=Profile)
+def delete_avatar_files(sender, instance, **kwargs):
+    """
+    Signal receiver to remove the resized avatar variants of a deleted Profile.
+
+    Args:
+        sender (type): The model class (Profile) that sent the signal.
+        instance (Profile): The Profile instance being deleted.
+        **kwargs: Additional keyword arguments provided by the signal.
+
+    Side Effects:
+        - Deletes the files listed in the Profile's `avatar_variants` from storage.
+    """
+    delete_avatar_variants(instance)
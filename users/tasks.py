@@ -0,0 +1,97 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import F
+from PIL import Image, ImageOps
+
+from posts.core.jobs import job_handler
+
+from .middleware import forget_cached_user
+from .models import Profile
+
+
+def encode(image: Image.Image, image_format: str) -> bytes:
+    """
+    Encode an image without any of its metadata.
+
+    Args:
+        image (Image.Image): The image to encode.
+        image_format (str): A Pillow format name, e.g. `WEBP` or `JPEG`.
+
+    Returns:
+        bytes: The encoded file.
+    """
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    output = BytesIO()
+    image.save(output, image_format, quality=85, optimize=True)
+    return output.getvalue()
+
+
+def delete_avatar_variants(profile: Profile) -> None:
+    """
+    Remove the resized copies of a profile's avatar from storage.
+
+    Args:
+        profile (Profile): The profile whose variants are deleted.
+    """
+    for name in profile.avatar_variants.values():
+        profile.image.storage.delete(name)
+
+
+@job_handler("avatar")
+def process_avatar(profile_id: str) -> None:
+    """
+    Shrink an uploaded avatar, strip its metadata and generate its resized variants.
+
+    The upload is capped to `AVATAR_MAX_SIZE` pixels per side, re-encoded
+    without EXIF data and saved under a new name, and a square WebP copy is
+    generated for each of the `AVATAR_SIZES`. The profile is then switched to
+    the new files, and only once that update succeeded is the upload deleted,
+    so a job that fails half way leaves the original for its retry. If the
+    user uploaded another image in the meantime, the new files are discarded
+    instead.
+
+    Args:
+        profile_id (str): The primary key of the profile.
+    """
+    profile = Profile.objects.filter(id=profile_id).first()
+    if profile is None or not profile.image:
+        return
+    storage, name = profile.image.storage, profile.image.name
+
+    with storage.open(name, "rb") as file, Image.open(file) as upload:
+        image_format = upload.format if upload.format in ("JPEG", "PNG") else "JPEG"
+        image = ImageOps.exif_transpose(upload)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    image.thumbnail((settings.AVATAR_MAX_SIZE, settings.AVATAR_MAX_SIZE))
+
+    capped = storage.save(
+        storage.get_alternative_name(*os.path.splitext(name)),
+        ContentFile(encode(image, image_format)),
+    )
+
+    token = hashlib.sha1(capped.encode()).hexdigest()[:8]
+    variants = {}
+    for size, pixels in settings.AVATAR_SIZES.items():
+        square = ImageOps.fit(image, (pixels, pixels), Image.Resampling.LANCZOS)
+        variants[f"{size}.webp"] = storage.save(
+            f"avatarts/variants/{profile.id}-{token}-{size}.webp",
+            ContentFile(encode(square, "WEBP")),
+        )
+
+    updated = Profile.objects.filter(id=profile.id, image=name).update(
+        image=capped, avatar_variants=variants, version=F("version") + 1
+    )
+    if updated:
+        storage.delete(name)
+        forget_cached_user(profile.user_id)
+    else:
+        profile.avatar_variants = variants
+        delete_avatar_variants(profile)
+        storage.delete(capped)
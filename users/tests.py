@@ -1,3 +1,136 @@
-from django.test import TestCase
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from .models import Profile
+from .tasks import process_avatar
+
+
+class ProfileSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("anna", "anna@example.com", "s3cret-pass")
+
+    def test_login_leaves_profile_alone(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/accounts/login/",
+                {"login": "anna@example.com", "password": "s3cret-pass"},
+            )
+        self.assertRedirects(response, "/", fetch_redirect_response=False)
+        self.assertEqual(len(queries), 12)
+        self.assertFalse([q for q in queries if "users_profile" in q["sql"]])
+
+    def test_profile_edit_writes_changed_fields_once(self):
+        self.client.force_login(self.user)
+        data = {
+            "realname": "Anna",
+            "email": "anna@example.com",
+            "location": "",
+            "bio": "",
+        }
+
+        with self.assertNumQueries(6):
+            response = self.client.post("/profile/edit/", data)
+        self.assertRedirects(response, "/profile/", fetch_redirect_response=False)
+        self.assertEqual(Profile.objects.get(user=self.user).realname, "Anna")
+
+    def test_email_changes_sync_both_ways(self):
+        self.client.force_login(self.user)
+        data = {"realname": "", "email": "a@example.com", "location": "", "bio": ""}
+        self.client.post("/profile/edit/", data)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "a@example.com")
+
+        self.user.email = "b@example.com"
+        with self.assertNumQueries(2):
+            self.user.save(update_fields=["email"])
+        self.assertEqual(Profile.objects.get(user=self.user).email, "b@example.com")
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("anna", "anna@example.com", "s3cret-pass")
+        self.client.force_login(self.user)
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        tables = ("auth_user", "users_profile")
+        return response, [
+            q for q in queries if any(f'FROM "{table}"' in q["sql"] for table in tables)
+        ]
+
+    def test_profile_loads_once_per_session(self):
+        response, queries = self.user_queries("/search/")
+        self.assertEqual(len(queries), 1)
+        self.assertIn("users_profile", queries[0]["sql"])
+
+        response, queries = self.user_queries("/search/")
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("users_profile", queries[0]["sql"])
+        self.assertContains(response, "anna")
+
+    def test_profile_edit_refreshes_header(self):
+        self.user_queries("/search/")
+        data = {
+            "realname": "Anna K",
+            "email": "anna@example.com",
+            "location": "",
+            "bio": "",
+        }
+        self.client.post("/profile/edit/", data)
+
+        response, queries = self.user_queries("/search/")
+        self.assertIn("users_profile", queries[0]["sql"])
+        self.assertContains(response, "Anna K")
+
+    def test_password_change_ends_session(self):
+        self.user_queries("/search/")
+        # Written without signals, as by another worker whose cache is not ours.
+        User.objects.filter(pk=self.user.pk).update(password=make_password("new-pass"))
+
+        response = self.client.get("/search/")
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_deactivation_ends_session(self):
+        self.user_queries("/search/")
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response = self.client.get("/search/")
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+
+class AvatarJobTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        user = User.objects.create_user("anna", "anna@example.com", "s3cret-pass")
+        self.profile = user.profile
+        upload = BytesIO()
+        Image.new("RGB", (2000, 1000), "red").save(upload, "PNG")
+        self.profile.image.save("anna.png", ContentFile(upload.getvalue()))
+
+    def test_original_is_replaced_after_the_update(self):
+        storage, original = self.profile.image.storage, self.profile.image.name
+
+        process_avatar(self.profile.id)
+
+        self.profile.refresh_from_db()
+        self.assertNotEqual(self.profile.image.name, original)
+        self.assertFalse(storage.exists(original))
+        with Image.open(self.profile.image.path) as image:
+            self.assertEqual(image.size, (1024, 512))
+        self.assertEqual(
+            sorted(self.profile.avatar_variants), ["medium.webp", "small.webp"]
+        )
+        self.assertTrue(self.profile.avatar.endswith(".webp"))
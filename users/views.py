@@ -1,16 +1,31 @@
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.db.models import Count
-from django.http import Http404, HttpRequest, HttpResponse
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 
-from posts.core import ReplyCreateForm
+from core.routers import read_from_replica
+from posts.core import (
+    ReplyCreateForm,
+    comment_queryset,
+    feed_queryset,
+    liked_queryset,
+    paginate_feed,
+)
+from posts.core.jobs import enqueue
+from posts.core.leaderboard import fill_leaderboard
+from posts.core.stats import rebuild_user_stats, top_ids, user_stats
+from posts.models import Comment, Post, Reply
 from users.core import ProfileForm
+from users.tasks import delete_avatar_variants
 
 
+@read_from_replica
 def profile_view(request: HttpRequest, username=None) -> HttpResponse:
     """
     Display the profile page of a specific user, either the currently logged-in user or a user identified by `username`.
@@ -28,45 +43,76 @@ def profile_view(request: HttpRequest, username=None) -> HttpResponse:
     Raises:
         Http404: If the profile of the specified user cannot be found or if the logged-in user does not have a profile.
 
+    The header and the top tabs read the user's precomputed `UserStats` row, so
+    their cost does not depend on how much the user has written. The latest
+    and liked posts are paginated with a keyset `cursor`.
+
     HTMX Options:
-        - `top-posts`: Fetches posts sorted by the number of likes, displaying only posts with likes greater than zero.
-        - `top-comments`: Fetches comments sorted by the number of likes, displaying only comments with likes greater than zero.
+        - `top-posts`: Fetches the user's most liked posts from their statistics.
+        - `top-comments`: Fetches the user's most liked comments from their statistics.
         - `liked-posts`: Fetches posts that the user has liked, ordered by the time they were liked.
     """
     if username:
-        profile = get_object_or_404(User, username=username).profile
+        user = get_object_or_404(
+            User.objects.select_related("profile", "stats"), username=username
+        )
     else:
-        try:
-            profile = request.user.profile
-        except:
-            raise Http404("User not found")
-
-    posts = profile.user.posts.all()
+        user = request.user
+    try:
+        profile = user.profile
+    except:
+        raise Http404("User not found")
+    stats = user_stats(user)
+
+    if request.htmx and "top-posts" in request.GET:
+        ids = top_ids(stats, Post)
+        posts = feed_queryset(Post.objects.filter(id__in=ids).order_by())
+        found = {post.id: post for post in posts}
+        posts = [found[pk] for pk in ids if pk in found]
+        return render(request, "snippets/loop_profile_posts.html", {"posts": posts})
 
-    if request.htmx:
-        if "top-posts" in request.GET:
-            posts = (
-                profile.user.posts.annotate(num_likes=Count("likes"))
-                .filter(num_likes__gt=0)
-                .order_by("-num_likes")
-            )
-        elif "top-comments" in request.GET:
-            comments = (
-                profile.user.comments.annotate(num_likes=Count("likes"))
-                .filter(num_likes__gt=0)
-                .order_by("-num_likes")
+    if request.htmx and "top-comments" in request.GET:
+        ids = top_ids(stats, Comment)
+        comments = comment_queryset(Comment.objects.filter(id__in=ids).order_by())
+        found = {c.id: c for c in comments.select_related("parent_post")}
+        return render(
+            request,
+            "snippets/loop_profile_comments.html",
+            {
+                "comments": [found[pk] for pk in ids if pk in found],
+                "replyform": ReplyCreateForm(),
+            },
+        )
+
+    cursor = request.GET.get("cursor")
+    try:
+        if request.htmx and "liked-posts" in request.GET:
+            tab = "liked-posts"
+            entries, next_cursor = paginate_feed(
+                liked_queryset(user),
+                cursor,
+                settings.PROFILE_PAGE_SIZE,
+                key=("created", "post_id"),
             )
-            replyform = ReplyCreateForm()
-            return render(
-                request,
-                "snippets/loop_profile_comments.html",
-                {"comments": comments, "replyform": replyform},
+            posts = [entry.post for entry in entries]
+        else:
+            tab = None
+            posts, next_cursor = paginate_feed(
+                feed_queryset(user.posts.all()), cursor, settings.PROFILE_PAGE_SIZE
             )
-        elif "liked-posts" in request.GET:
-            posts = profile.user.likedposts.order_by("-likedpost__created")
-        return render(request, "snippets/loop_profile_posts.html", {"posts": posts})
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor")
 
-    context = {"profile": profile, "posts": posts}
+    context = {
+        "profile": profile,
+        "stats": stats,
+        "posts": posts,
+        "tab": tab,
+        "next_cursor": next_cursor,
+    }
+
+    if request.htmx:
+        return render(request, "snippets/loop_profile_posts.html", context)
 
     return render(request, "users/profile.html", context)
 
@@ -76,6 +122,9 @@ def profile_edit_view(request: HttpRequest) -> HttpResponse:
     """
     Handle the profile edit functionality for the currently logged-in user.
 
+    A newly uploaded avatar is served as uploaded until a background job has
+    capped its size, stripped its metadata and generated its resized variants.
+
     Args:
         request (HttpRequest): The HTTP request object containing user session data,
                                form data, and file uploads for profile editing.
@@ -90,7 +139,17 @@ def profile_edit_view(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
         form = ProfileForm(request.POST, request.FILES, instance=request.user.profile)
         if form.is_valid():
-            form.save()
+            profile = form.save(commit=False)
+            fields = ["version", *form.changed_data]
+            if "image" in form.changed_data:
+                delete_avatar_variants(profile)
+                profile.avatar_variants = {}
+                fields.append("avatar_variants")
+            profile.version += 1
+            with transaction.atomic():
+                profile.save(update_fields=fields)
+                if "image" in form.changed_data and profile.image:
+                    enqueue("avatar", profile.id)
             return redirect("profile")
     if request.path == reverse("profile-onboarding"):
         template = "users/profile_onboarding.html"
@@ -117,7 +176,25 @@ def profile_delete_view(request: HttpRequest) -> HttpResponse:
 
     if request.method == "POST":
         logout(request)
-        user.delete()
+        with transaction.atomic():
+            # The user's likes are removed by cascade, so release their counts first.
+            authors = set()
+            for model in (Post, Comment, Reply):
+                liked = model.objects.filter(likes=user)
+                authors.update(liked.values_list("author_id", flat=True))
+            Post.objects.filter(likedpost__user=user).update(
+                likes_count=F("likes_count") - 1
+            )
+            Comment.objects.filter(likedcomment__user=user).update(
+                likes_count=F("likes_count") - 1
+            )
+            Reply.objects.filter(likedreply__user=user).update(
+                likes_count=F("likes_count") - 1
+            )
+            user.delete()
+            fill_leaderboard(Post)
+            fill_leaderboard(Comment)
+            rebuild_user_stats(authors - {None})
         messages.success(request, "Account deleted, what a pity")
         return redirect("home")
 